@@ -0,0 +1,95 @@
+"""
+Compares writing every agent log in a transaction of its own with the batched log queue.
+
+Writes to the `logs` table of the configured database and removes the written logs afterwards.
+Run from the backend directory, optionally against another database:
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.agent_log_ingestion
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from src.core.settings import get_settings
+from src.models import Log
+from src.repositories.log import log_repo
+from src.schemas.ws.log import LogCreate
+from src.utils.agent_log import AgentLogQueue
+
+AGENTS = 20
+LOGS_PER_AGENT = 250
+
+
+def build_logs(session_id: uuid.UUID) -> list[list[LogCreate]]:
+    request_id = uuid.uuid4()
+    return [
+        [
+            LogCreate(
+                session_id=session_id,
+                request_id=request_id,
+                agent_id=f"agent_{agent}",
+                log_level="info",
+                message=f"Step {i} of agent {agent}",
+            )
+            for i in range(LOGS_PER_AGENT)
+        ]
+        for agent in range(AGENTS)
+    ]
+
+
+async def write_one_by_one(session_factory: async_sessionmaker, logs: list[LogCreate]) -> None:
+    # What handling an AGENT_LOG message used to do
+    for log_in in logs:
+        async with session_factory() as db:
+            await log_repo.create(db, obj_in=log_in)
+
+
+async def run(session_factory: async_sessionmaker, batched: bool) -> float:
+    session_id = uuid.uuid4()
+    agents = build_logs(session_id)
+
+    start = time.perf_counter()
+    if batched:
+        queue = AgentLogQueue(session_factory=session_factory)
+        queue.start()
+
+        async def put_all(logs: list[LogCreate]) -> None:
+            for log_in in logs:
+                await queue.put(log_in)
+
+        await asyncio.gather(*(put_all(logs) for logs in agents))
+        await queue.stop()
+    else:
+        await asyncio.gather(*(write_one_by_one(session_factory, logs) for logs in agents))
+    elapsed = time.perf_counter() - start
+
+    async with session_factory() as db:
+        await db.execute(delete(Log).where(Log.session_id == session_id))
+        await db.commit()
+    return AGENTS * LOGS_PER_AGENT / elapsed
+
+
+async def main():
+    logging.disable(logging.CRITICAL)
+    url = os.environ.get("BENCHMARK_DATABASE_URL") or get_settings().SQLALCHEMY_ASYNC_DATABASE_URI
+    # Same engine setup as the backend
+    engine = create_async_engine(url, poolclass=NullPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Log.__table__.create, checkfirst=True)
+    session_factory = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    one_by_one = await run(session_factory, batched=False)
+    batched = await run(session_factory, batched=True)
+    await engine.dispose()
+
+    print(f"{'logs':>6} | {'one by one (logs/s)':>19} | {'batched (logs/s)':>16} | speedup")
+    print(f"{AGENTS * LOGS_PER_AGENT:>6} | {one_by_one:>19.0f} | {batched:>16.0f} | {batched / one_by_one:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
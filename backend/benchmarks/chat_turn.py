@@ -0,0 +1,216 @@
+"""
+Compares the database work of a chat turn (user message and answer) done with separate repository
+calls, as the frontend WebSocket handler used to, with the chat turn service.
+
+Writes a user, its provider, config, file and chat to the configured database and removes them afterwards.
+Run from the backend directory, optionally against another database:
+    BENCHMARK_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.chat_turn
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from sqlalchemy import and_, delete, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload
+from sqlalchemy.pool import NullPool
+from src.auth.encrypt import encrypt_secret
+from src.core.settings import get_settings
+from src.db.base import Base
+from src.models import ChatConversation, ChatMessage, File, ModelConfig, ModelProvider, User
+from src.repositories.files import files_repo
+from src.schemas.api.chat.dto import ChatDetailsDTO
+from src.schemas.api.chat.schemas import GetChatMessage
+from src.schemas.api.files.dto import FileDTO
+from src.schemas.ws.frontend import LLMPropertiesDecryptCreds
+from src.utils.chat_turn import chat_turn_service
+from src.utils.enums import SenderType
+
+TURNS = 50
+PROVIDER = "openai"
+CONFIG = "benchmark"
+
+
+async def create_fixtures(session_factory: async_sessionmaker) -> tuple[User, list[uuid.UUID]]:
+    async with session_factory() as db:
+        user = User(id=uuid.uuid4(), username=f"benchmark_{uuid.uuid4()}", password="")
+        provider = ModelProvider(
+            id=uuid.uuid4(),
+            name=PROVIDER,
+            api_key=encrypt_secret("sk-benchmark"),
+            provider_metadata={},
+            creator_id=user.id,
+        )
+        config = ModelConfig(
+            name=CONFIG,
+            model="gpt-4o",
+            system_prompt="",
+            credentials={},
+            provider_id=provider.id,
+            creator_id=user.id,
+        )
+        file_ids = [uuid.uuid4() for _ in range(TURNS)]
+        files = [
+            File(
+                id=file_id,
+                creator_id=user.id,
+                mimetype="text/plain",
+                original_name="notes.txt",
+                internal_name=str(file_id),
+                internal_id=uuid.uuid4(),
+                from_agent=False,
+            )
+            for file_id in file_ids
+        ]
+        db.add_all([user, provider, config, *files])
+        await db.commit()
+        await db.refresh(user)
+        return user, file_ids
+
+
+async def add_message_as_before(
+    db: AsyncSession, user: User, session_id: uuid.UUID, request_id: uuid.UUID, sender_type: SenderType
+) -> None:
+    # chat_repo.add_message_to_conversation before ChatTurnService: loads the chat with all its messages,
+    # commits the message, refreshes it and loads the whole history again for the return value
+    chat = (
+        await db.execute(
+            select(ChatConversation)
+            .options(joinedload(ChatConversation.messages))
+            .where(and_(ChatConversation.session_id == session_id, ChatConversation.creator_id == user.id))
+        )
+    ).scalars().first()
+    message = ChatMessage(sender_type=sender_type, content="Hello", conversation_id=session_id, request_id=request_id)
+    db.add(message)
+    await db.commit()
+    await db.refresh(message)
+    chat = (
+        await db.execute(
+            select(ChatConversation)
+            .options(joinedload(ChatConversation.messages))
+            .where(and_(ChatConversation.session_id == session_id, ChatConversation.creator_id == user.id))
+        )
+    ).scalars().first()
+    ChatDetailsDTO(
+        title=chat.title,
+        created_at=chat.created_at,
+        updated_at=chat.updated_at,
+        session_id=chat.session_id,
+        messages=[GetChatMessage(**message.__dict__) for message in chat.messages],
+    )
+
+
+async def turn_with_repositories(
+    session_factory: async_sessionmaker, user: User, session_id: uuid.UUID, file_id: uuid.UUID
+) -> None:
+    """
+    The queries of a chat turn as the frontend WebSocket handler ran them before ChatTurnService,
+    inlined so that later changes to the repositories don't change the baseline.
+    """
+    request_id = uuid.uuid4()
+    async with session_factory() as db:
+        chat = (
+            await db.execute(
+                select(ChatConversation)
+                .where(and_(ChatConversation.session_id == session_id, ChatConversation.creator_id == user.id))
+                .order_by(ChatConversation.created_at.desc())
+            )
+        ).scalars().first()
+        if not chat:
+            chat = ChatConversation(title="Hello", creator_id=user.id, session_id=session_id)
+            db.add(chat)
+            await db.commit()
+            await db.refresh(chat)
+
+        # files_repo.enrich_files_with_session_request_id: a SELECT, a commit and a refresh per file
+        files = (
+            await db.execute(select(File).where(and_(File.id.in_([file_id]), File.creator_id == user.id)))
+        ).scalars().all()
+        for file in files:
+            file.request_id = request_id
+            file.session_id = session_id
+        await db.commit()
+        for file in files:
+            await db.refresh(file)
+            FileDTO(**file.__dict__)
+
+        provider = await db.scalar(
+            select(ModelProvider).where(and_(ModelProvider.name == PROVIDER, ModelProvider.creator_id == user.id))
+        )
+        config = (
+            await db.execute(
+                select(ModelConfig).where(and_(ModelConfig.name == CONFIG, ModelConfig.creator_id == user.id))
+            )
+        ).scalars().first()
+        LLMPropertiesDecryptCreds(
+            config_name=config.name,
+            provider=provider.name,
+            model=config.model,
+            credentials={**config.credentials, **provider.provider_metadata, "api_key": provider.api_key},
+        )
+        for sender_type in (SenderType.user, SenderType.master_agent):
+            await add_message_as_before(db, user, session_id, request_id, sender_type)
+        await files_repo.list_files_by_request_id(db=db, request_id=request_id)
+
+
+async def turn_with_service(
+    session_factory: async_sessionmaker, user: User, session_id: uuid.UUID, file_id: uuid.UUID
+) -> None:
+    request_id = uuid.uuid4()
+    async with session_factory() as db:
+        await chat_turn_service.resolve_llm_properties(
+            db=db, user_model=user, provider_name=PROVIDER, config_name=CONFIG
+        )
+        await chat_turn_service.start_turn(
+            db=db, user_model=user, session_id=session_id, request_id=request_id, message="Hello", file_ids=[file_id]
+        )
+        await chat_turn_service.finish_turn(db=db, session_id=session_id, request_id=request_id, response="Hello")
+
+
+async def run(session_factory: async_sessionmaker, statements: list[int], turn) -> tuple[float, float]:
+    user, file_ids = await create_fixtures(session_factory)
+    session_id = uuid.uuid4()
+
+    statements[0] = 0
+    start = time.perf_counter()
+    for file_id in file_ids:
+        await turn(session_factory, user, session_id, file_id)
+    elapsed = time.perf_counter() - start
+    executed = statements[0]
+
+    async with session_factory() as db:
+        await db.execute(delete(User).where(User.id == user.id))
+        await db.commit()
+    return elapsed / TURNS, executed / TURNS
+
+
+async def main():
+    logging.disable(logging.CRITICAL)
+    url = os.environ.get("BENCHMARK_DATABASE_URL") or get_settings().SQLALCHEMY_ASYNC_DATABASE_URI
+    # Same engine setup as the backend
+    engine = create_async_engine(url, poolclass=NullPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all, checkfirst=True)
+    session_factory = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    statements = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*args):
+        statements[0] += 1
+
+    repositories_time, repositories_statements = await run(session_factory, statements, turn_with_repositories)
+    service_time, service_statements = await run(session_factory, statements, turn_with_service)
+    await engine.dispose()
+
+    print(f"{'':>12} | {'statements per turn':>19} | {'ms per turn':>11}")
+    print(f"{'repositories':>12} | {repositories_statements:>19.1f} | {repositories_time * 1000:>11.2f}")
+    print(f"{'service':>12} | {service_statements:>19.1f} | {service_time * 1000:>11.2f}")
+    print(f"speedup: {repositories_time / service_time:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
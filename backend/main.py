@@ -20,11 +20,14 @@ from src.middleware.provider import ProviderLookupMiddleware
 from src.routes.api import api_router
 from src.routes.files.routes import files_router
 from src.routes.websocket import ws_router
+from src.utils.agent_log import agent_log_queue
+from src.utils.chat_turn import track_llm_config_changes
 from src.utils.jobs import run_startup_jobs
 from src.utils.message_handler_validator import message_handler_validator
 from src.utils.setup_logger import init_logging
 
 init_logging()
+track_llm_config_changes()
 settings = get_settings()
 
 session = GenAISession(
@@ -51,13 +54,13 @@ async def lifespan(app: FastAPI):
         await run_startup_jobs()
 
         app.state.genai_session = session
-        app.state.frontend_ws = None
+        agent_log_queue.start()
 
         @session.bind()
         async def message_handler(
             agent_context: GenAIContext,
             message_type: str,
-            agent_uuid: str,
+            agent_uuid: Optional[str] = None,
             session_id: Optional[str] = None,
             request_id: Optional[str] = None,
             log_level: Optional[str] = None,
@@ -66,6 +69,10 @@ async def lifespan(app: FastAPI):
             agent_description: Optional[str] = "",
             agent_input_schema: Optional[dict] = None,
             agent_jwt: Optional[str] = None,
+            agent_user_id: Optional[str] = None,
+            agents: Optional[list[dict]] = None,
+            event: Optional[str] = None,
+            data: Optional[dict] = None,
         ):
             await message_handler_validator(
                 session=session,
@@ -80,6 +87,10 @@ async def lifespan(app: FastAPI):
                 message_type=message_type,
                 state=app.state,
                 jwt_token=agent_jwt,
+                agent_user_id=agent_user_id,
+                agents=agents,
+                event=event,
+                data=data,
             )
 
         logger.info("GenAI Session started")
@@ -116,6 +127,10 @@ async def lifespan(app: FastAPI):
     except (asyncio.CancelledError, websockets.exceptions.ConnectionClosedError):
         pass
 
+    finally:
+        # agent logs still waiting for their batch are written before shutting down
+        await agent_log_queue.stop()
+
 
 app = FastAPI(title="GenAI Backend", lifespan=lifespan)
 app.include_router(api_router)
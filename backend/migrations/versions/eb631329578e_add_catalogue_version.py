@@ -0,0 +1,38 @@
+"""Add catalogue version
+
+Revision ID: eb631329578e
+Revises: bdf04422c056
+Create Date: 2026-10-18 10:12:41.218903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'eb631329578e'
+down_revision: Union[str, None] = 'bdf04422c056'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('catalogueversions',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_catalogueversions_id'), 'catalogueversions', ['id'], unique=False)
+    # Starts at the current time, so versions cached before the database was recreated are never reused
+    op.execute(
+        "INSERT INTO catalogueversions (id, version) "
+        "VALUES (1, (extract(epoch from now()) * 1000000)::bigint)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_catalogueversions_id'), table_name='catalogueversions')
+    op.drop_table('catalogueversions')
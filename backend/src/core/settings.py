@@ -37,6 +37,17 @@ class Settings(BaseSettings):
     )
     BACKEND_CORS_ORIGINS: Optional[str] = Field(default="[*]")
 
+    # Messages of a single frontend WebSocket handled at the same time
+    FRONTEND_WS_MAX_CONCURRENT_REQUESTS: int = Field(default=4)
+    # Agent logs and master agent events buffered per frontend WebSocket, the oldest are dropped first
+    FRONTEND_WS_SEND_BUFFER: int = Field(default=1000)
+
+    # Agent logs are inserted in batches of up to AGENT_LOG_BATCH_SIZE logs, at most AGENT_LOG_FLUSH_INTERVAL_MS
+    # after the first log of the batch. Logs are dropped once AGENT_LOG_QUEUE_SIZE logs are pending
+    AGENT_LOG_BATCH_SIZE: int = Field(default=500)
+    AGENT_LOG_FLUSH_INTERVAL_MS: int = Field(default=50)
+    AGENT_LOG_QUEUE_SIZE: int = Field(default=10000)
+
     DEFAULT_FILES_FOLDER_NAME: str = Field(default="files")
 
     REDIS_BROKER_URI: str = Field(default="redis://genai-redis:6379/0")
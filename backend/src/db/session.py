@@ -4,6 +4,7 @@ from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import NullPool
 from src.core.settings import get_settings
+from src.utils.catalogue import track_catalogue_changes
 
 settings = get_settings()
 
@@ -16,6 +17,9 @@ engine = create_async_engine(
 )
 async_session = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Registered wherever the database is written to, the API as well as the Celery worker
+track_catalogue_changes()
+
 
 async def get_db() -> AsyncGenerator:
     async with async_session() as session:
@@ -1,7 +1,7 @@
 import uuid
 from typing import List
 
-from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy import BigInteger, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -364,6 +364,13 @@ class A2ACard(Base):
     )
 
 
+class CatalogueVersion(Base):
+    """Version of the agent catalogue, a single row shared by all backend processes"""
+
+    id: Mapped[int_pk]
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
 class ChatMessage(Base):
     id: Mapped[uuid_pk]
 
@@ -259,11 +259,18 @@ class AgentRepository(CRUDBase[Agent, AgentCreate, AgentUpdate]):
         )
         if not agent_jwt_payload:
             return  # TODO: raise jwt invalid
+        return await self.get_agent_by_creator(
+            db=db, id_=agent_jwt_payload.sub, creator_id=agent_jwt_payload.user_id
+        )
+
+    async def get_agent_by_creator(
+        self, db: AsyncSession, id_: str, creator_id: str
+    ) -> Optional[Agent]:
         q = await db.execute(
             select(self.model).where(
                 and_(
-                    self.model.id == agent_jwt_payload.sub,
-                    self.model.creator_id == agent_jwt_payload.user_id,
+                    self.model.id == id_,
+                    self.model.creator_id == creator_id,
                 )
             )
         )
@@ -651,6 +658,7 @@ LIMIT :limit OFFSET :offset;
                     type=AgentType.mcp,
                     url=col["server_url"],
                     agent_schema=tool_schema,
+                    annotations=col["json_data2"],
                     created_at=created_at,
                     updated_at=updated_at,
                     is_active=True,
@@ -753,6 +761,7 @@ LIMIT :limit OFFSET :offset;
                         type=AgentType.mcp,
                         url=s.server_url,
                         agent_schema=tool_schema,
+                        annotations=tool.annotations,
                         created_at=s.created_at,
                         updated_at=s.updated_at,
                     ).model_dump(mode="json", exclude_none=True)
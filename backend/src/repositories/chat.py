@@ -1,8 +1,7 @@
-import copy
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import and_, select
+from sqlalchemy import and_, exists, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
@@ -93,21 +92,6 @@ class ChatRepository(
         )
         return q.scalars().first()
 
-    async def get_chat_history_by_session_id(
-        self, db: AsyncSession, user_model: User, session_id: str
-    ):
-        q = await db.execute(
-            select(self.model)
-            .options(joinedload(self.model.messages))
-            .where(
-                and_(
-                    self.model.session_id == session_id,
-                    self.model.creator_id == user_model.id,
-                )
-            )
-        )
-        return q.scalars().first()
-
     async def create_chat_by_session_id(
         self,
         db: AsyncSession,
@@ -188,38 +172,43 @@ class ChatRepository(
         # result returns either cursor obj or None
         return obj
 
-    async def add_message_to_conversation(
-        self,
+    async def chat_exists(
+        self, db: AsyncSession, user_model: User, session_id: str
+    ) -> bool:
+        """
+        Checks that the user has a chat with the session_id, by primary key, without loading it.
+        """
+        return await db.scalar(
+            select(
+                exists().where(
+                    and_(
+                        self.model.session_id == session_id,
+                        self.model.creator_id == user_model.id,
+                    )
+                )
+            )
+        )
+
+    @staticmethod
+    def add_message(
         db: AsyncSession,
-        user_model: User,
         session_id: str,
         request_id: str,
         message_in: BaseChatMessage,
-    ):
-        user = copy.deepcopy(user_model)
-
-        chat = await self.get_chat_history_by_session_id(
-            db=db, user_model=user_model, session_id=session_id
-        )
-        if not chat:
-            raise HTTPException(
-                detail=f"Chat with session_id: '{session_id}' does not exist",
-                status_code=400,
-            )
-
-        new_message = ChatMessage(
+    ) -> ChatMessage:
+        """
+        Appends a message to the chat in the transaction of the caller, which checks that the chat
+        exists and commits. The chat and its other messages aren't loaded, so the cost doesn't grow
+        with the length of the conversation.
+        """
+        message = ChatMessage(
             sender_type=message_in.sender_type,
             content=message_in.content,
             conversation_id=session_id,
             request_id=request_id,
         )
-        db.add(new_message)
-        await db.commit()
-        await db.refresh(new_message)
-
-        return await self.get_chat_history(
-            db=db, user_model=user, session_id=session_id
-        )
+        db.add(message)
+        return message
 
 
 chat_repo = ChatRepository(ChatConversation)
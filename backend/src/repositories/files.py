@@ -3,7 +3,7 @@ from typing import List, Optional
 from uuid import UUID
 
 from fastapi import HTTPException, status
-from sqlalchemy import and_, select
+from sqlalchemy import and_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.models import File, User
 from src.repositories.base import CRUDBase
@@ -122,7 +122,7 @@ class FilesRepository(CRUDBase[File, FileCreate, FileUpdate]):
             files=files, return_type=FileValidationOutputChoice.dto
         )
 
-    async def enrich_files_with_session_request_id(
+    async def attach_files_to_request(
         self,
         db: AsyncSession,
         file_ids: List[str],
@@ -131,9 +131,8 @@ class FilesRepository(CRUDBase[File, FileCreate, FileUpdate]):
         user_model: User,
     ) -> List[FileDTO]:
         """
-        Retrieves a list of files metadata by a list of 'file_id' values,
-        if file metadata is returned,
-        fields 'session_id' and 'request_id' are updated in the database
+        Sets 'session_id' and 'request_id' of the user's files in a single UPDATE ... RETURNING
+        statement. Doesn't commit, so that it can be part of a larger transaction.
 
         Args:
             db: The database session.
@@ -142,28 +141,20 @@ class FilesRepository(CRUDBase[File, FileCreate, FileUpdate]):
             request_id: request_id provided in frontend message
 
         Returns:
-            List of file ids objects with file metadata.
+            List of file ids objects with file metadata of the updated files.
         """
-        q = await db.execute(
-            select(self.model).where(
+        files = await db.scalars(
+            update(self.model)
+            .where(
                 and_(
                     self.model.id.in_(file_ids), self.model.creator_id == user_model.id
                 )
             )
+            .values(session_id=session_id, request_id=request_id)
+            .returning(self.model)
+            .execution_options(synchronize_session=False)
         )
-        files = q.scalars().all()
-        for file in files:
-            file.request_id = request_id
-            file.session_id = session_id
-
-        await db.commit()
-
-        updated_files = []
-        for file in files:
-            await db.refresh(file)
-            updated_files.append(FileDTO(**file.__dict__))
-
-        return updated_files
+        return [FileDTO(**file.__dict__) for file in files]
 
     async def get_files_metadata_by_user(
         self, db: AsyncSession, user_model: User, limit: int = 100, offset: int = 0
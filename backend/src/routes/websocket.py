@@ -1,3 +1,4 @@
+import asyncio
 import copy
 import logging
 import traceback
@@ -8,24 +9,25 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
 from genai_session.session import AgentResponse, GenAISession
 from genai_session.utils.naming_enums import MasterServerName
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.settings import get_settings
-from src.db.session import AsyncDBSession
-from src.repositories.chat import chat_repo
-from src.repositories.files import files_repo
-from src.repositories.model_config import model_config_repo
+from src.db.session import AsyncDBSession, async_session
+from src.models import User
 from src.schemas.api.agent.dto import AgentResponseWithFilesDTO, AgentTypeResponseDTO
-from src.schemas.api.chat.schemas import CreateChatMessage
 from src.schemas.ws.frontend import (
     AgentResponseDTO,
+    FrontendStreamEventDTO,
     IncomingFrontendMessage,
-    LLMPropertiesDecryptCreds,
 )
 from src.schemas.ws.ml import OutgoingMLRequestSchema
-from src.utils.enums import SenderType
+from src.utils.catalogue import get_catalogue_version
+from src.utils.chat_turn import chat_turn_service
+from src.utils.exceptions import ModelConfigNotFoundException
+from src.utils.frontend_hub import frontend_hub
 from src.utils.validate_uuid import is_valid_uuid
 from src.utils.validation_error_handler import validation_exception_handler
-from src.utils.websocket import get_current_ws_user
+from src.utils.websocket import get_current_ws_user, request_scoped_session
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -136,11 +138,47 @@ async def handle_frontend_ws(
             )
             return
 
-    websocket.app.state.frontend_ws = websocket
     await websocket.accept()
 
     session: GenAISession = websocket.app.state.genai_session
 
+    try:
+        async with frontend_hub.subscribe(
+            websocket=websocket, user_id=str(user_model.id), session_id=session_id
+        ):
+            await receive_frontend_messages(
+                websocket=websocket,
+                session=session,
+                user_model=user_model,
+                session_id=session_id,
+            )
+
+    except WebSocketDisconnect:
+        logger.warning("Frontend client disconnected")
+
+    except Exception:
+        logger.error(
+            f"Unexpected error occured. Traceback: {traceback.format_exc(limit=600)}"
+        )
+
+
+async def receive_frontend_messages(
+    websocket: WebSocket,
+    session: GenAISession,
+    user_model: User,
+    session_id: str,
+):
+    """
+    Reads messages of a frontend socket and handles each of them in a task of its own.
+    """
+    # Messages are handled concurrently, so that a slow request doesn't block the next ones
+    semaphore = asyncio.Semaphore(settings.FRONTEND_WS_MAX_CONCURRENT_REQUESTS)
+    tasks: set[asyncio.Task] = set()
+
+    def request_done(task: asyncio.Task) -> None:
+        tasks.discard(task)
+        semaphore.release()
+
     try:
         while True:
             try:
@@ -151,153 +189,51 @@ async def handle_frontend_ws(
                 await websocket.send_text(
                     f"Message validation failed. Details: {validation_exception_handler(exc=e)}"  # noqa: E501
                 )
-            chat_title = message_obj.message[:20]
-            if not chat_title:
-                chat_title = "New Chat"
+                continue
 
-            chat = await chat_repo.get_chat_by_session_id(
-                db=db, session_id=session_id, user_model=user_model
-            )
-            if not chat:
-                await chat_repo.create_chat_by_session_id(
-                    db=db,
+            # Stops reading once the limit is reached, until a request completes
+            await semaphore.acquire()
+            task = asyncio.create_task(
+                handle_frontend_message(
+                    websocket=websocket,
+                    session=session,
                     user_model=user_model,
                     session_id=session_id,
-                    initial_user_message=chat_title,
-                )
-
-            request_id = str(uuid4())
-            file_ids = message_obj.files
-            if file_ids:
-                files = await files_repo.enrich_files_with_session_request_id(
-                    db=db,
-                    file_ids=file_ids,
-                    session_id=session_id,
-                    request_id=request_id,
-                    user_model=user_model,
+                    message_obj=message_obj,
                 )
-            else:
-                files = []
-
-            provider = await model_config_repo.get_provider_by_name(
-                db=db, provider_name=message_obj.provider, user_id=user_model.id
             )
-            if not provider:
-                await websocket.send_json(
-                    {"error": f"Provider {message_obj.provider} does not exist"}
-                )
-                await websocket.close(
-                    code=status.WS_1003_UNSUPPORTED_DATA,
-                    reason=f"Provider {message_obj.provider} does not exist",
-                )
+            tasks.add(task)
+            task.add_done_callback(request_done)
+
+    finally:
+        # Nobody is left to receive the responses of pending requests
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-            config = await model_config_repo.find_model_by_config_name(
-                db=db, config_name=message_obj.llm_name, user_model=user_model
-            )
-            if not config:
-                await websocket.send_json(
-                    {"error": f"Config {message_obj.llm_name} does not exist"}
-                )
-                await websocket.close(
-                    code=status.WS_1003_UNSUPPORTED_DATA,
-                    reason=f"Config {message_obj.llm_name} does not exist",
-                )
-            try:
-                enriched_llm_props = LLMPropertiesDecryptCreds(
-                    config_name=config.name,
-                    provider=provider.name,
-                    model=config.model,
-                    temperature=config.temperature,
-                    system_prompt=config.system_prompt,
-                    user_prompt=config.user_prompt,
-                    credentials={
-                        **config.credentials,
-                        **provider.provider_metadata,
-                        "api_key": provider.api_key,
-                    },
-                    max_last_messages=config.max_last_messages,
-                )
-            except ValueError:
-                await websocket.send_json(
-                    {
-                        "error": "Could not decrypt api_key. Make sure 'api_key' exists and model config was created beforehand "  # noqa: E501
-                    }
-                )
-                return
 
-            await chat_repo.add_message_to_conversation(
+async def handle_frontend_message(
+    websocket: WebSocket,
+    session: GenAISession,
+    user_model: User,
+    session_id: str,
+    message_obj: IncomingFrontendMessage,
+):
+    """
+    Handles a single message of the frontend: stores it, sends it to the master agent and
+    sends the response back. Runs as a task of its own with its own DB session.
+    """
+    try:
+        async with async_session() as db:
+            await process_frontend_message(
                 db=db,
+                websocket=websocket,
+                session=session,
                 user_model=user_model,
                 session_id=session_id,
-                request_id=request_id,
-                message_in=CreateChatMessage(
-                    sender_type=SenderType.user, content=message_obj.message
-                ),
+                message_obj=message_obj,
             )
 
-            ml_request = OutgoingMLRequestSchema(
-                user_id=user_model.id,
-                session_id=session_id,
-                timestamp=int(datetime.now().timestamp()),
-                configs=enriched_llm_props.to_json(),
-                files=files,
-            )
-            req_body = ml_request.model_dump(exclude_none=True)
-
-            try:
-                session.request_id = request_id
-                session.session_id = session_id
-                response: AgentResponse = await session.send(
-                    client_id=MasterServerName.MASTER_SERVER_ML.value,
-                    message=req_body,
-                )
-                agent_response = AgentResponseDTO(
-                    execution_time=response.execution_time,
-                    response=response.response,
-                    request_id=request_id,
-                    session_id=session_id,
-                )
-                await chat_repo.add_message_to_conversation(
-                    db=db,
-                    user_model=user_model,
-                    session_id=session_id,
-                    request_id=request_id,
-                    message_in=CreateChatMessage(
-                        sender_type=SenderType.master_agent,
-                        content=agent_response.response,
-                    ),
-                )
-
-                files_by_request_id = await files_repo.list_files_by_request_id(
-                    db=db, request_id=request_id
-                )
-                response_with_files = AgentResponseWithFilesDTO(
-                    **agent_response.model_dump(mode="json"),
-                    files=files_by_request_id,
-                )
-
-                response_structure = AgentTypeResponseDTO(
-                    type="agent_response", response=response_with_files
-                )
-                await websocket.send_text(response_structure.model_dump_json())
-            except ConnectionRefusedError:
-                logger.critical(
-                    f"Cannot connect to the router service at '{settings.ROUTER_WS_URL}'. Make sure it is running and envs are configured correctly"  # noqa: E501
-                )
-                await websocket.send_json(
-                    {"error": "Cannot connect to router service. Try again later"}
-                )
-                await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
-                raise ConnectionRefusedError(
-                    "Cannot connect to router service. Make sure it is running and envs are configured correctly"
-                )
-            except Exception:
-                logger.error(f"Unexpected error occured: {traceback.format_exc()}")
-                await websocket.send_json(
-                    {"error": "Unexpected error occured. Try again later"}
-                )
-                await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
-
     except ValidationError as e:
         logger.debug(traceback.format_exc())
         await websocket.send_text(
@@ -308,10 +244,126 @@ async def handle_frontend_ws(
             f"Message validation failed. Incorrect value was provided. Details: {str(e)}"
         )
 
-    except WebSocketDisconnect:
-        logger.warning("Frontend client disconnected")
+    except (WebSocketDisconnect, asyncio.CancelledError):
+        raise
 
     except Exception:
         logger.error(
             f"Unexpected error occured. Traceback: {traceback.format_exc(limit=600)}"
         )
+
+
+async def process_frontend_message(
+    db: AsyncSession,
+    websocket: WebSocket,
+    session: GenAISession,
+    user_model: User,
+    session_id: str,
+    message_obj: IncomingFrontendMessage,
+):
+    try:
+        enriched_llm_props = await chat_turn_service.resolve_llm_properties(
+            db=db,
+            user_model=user_model,
+            provider_name=message_obj.provider,
+            config_name=message_obj.llm_name,
+        )
+    except ModelConfigNotFoundException as e:
+        await websocket.send_json({"error": str(e)})
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=str(e))
+        return
+    except ValueError:
+        await websocket.send_json(
+            {
+                "error": "Could not decrypt api_key. Make sure 'api_key' exists and model config was created beforehand "  # noqa: E501
+            }
+        )
+        return
+
+    request_id = str(uuid4())
+    # Logs and events of the request are routed back to the sockets of this user and session
+    frontend_hub.track_request(
+        request_id=request_id, user_id=str(user_model.id), session_id=session_id
+    )
+    # Sent before anything else of the request, so the frontend only shows events of its latest one
+    await websocket.send_text(
+        FrontendStreamEventDTO(
+            session_id=session_id,
+            request_id=request_id,
+            event="request_started",
+            data={"client_request_id": message_obj.client_request_id},
+        ).model_dump_json()
+    )
+    try:
+        files = await chat_turn_service.start_turn(
+            db=db,
+            user_model=user_model,
+            session_id=session_id,
+            request_id=request_id,
+            message=message_obj.message,
+            file_ids=message_obj.files,
+        )
+    except ValueError as e:
+        await websocket.send_json({"error": str(e), "request_id": request_id})
+        return
+
+    ml_request = OutgoingMLRequestSchema(
+        user_id=user_model.id,
+        session_id=session_id,
+        timestamp=int(datetime.now().timestamp()),
+        configs=enriched_llm_props.to_json(),
+        files=files,
+        catalogue_version=await get_catalogue_version(db),
+    )
+    req_body = ml_request.model_dump(exclude_none=True)
+
+    try:
+        response: AgentResponse = await request_scoped_session(
+            session=session, request_id=request_id, session_id=session_id
+        ).send(
+            client_id=MasterServerName.MASTER_SERVER_ML.value,
+            message=req_body,
+        )
+        agent_response = AgentResponseDTO(
+            execution_time=response.execution_time,
+            response=response.response,
+            request_id=request_id,
+            session_id=session_id,
+        )
+        files_by_request_id = await chat_turn_service.finish_turn(
+            db=db,
+            session_id=session_id,
+            request_id=request_id,
+            response=agent_response.response,
+        )
+        response_with_files = AgentResponseWithFilesDTO(
+            **agent_response.model_dump(mode="json"),
+            files=files_by_request_id,
+        )
+
+        response_structure = AgentTypeResponseDTO(
+            type="agent_response", response=response_with_files
+        )
+        await websocket.send_text(response_structure.model_dump_json())
+    except ConnectionRefusedError:
+        logger.critical(
+            f"Cannot connect to the router service at '{settings.ROUTER_WS_URL}'. Make sure it is running and envs are configured correctly"  # noqa: E501
+        )
+        await websocket.send_json(
+            {"error": "Cannot connect to router service. Try again later"}
+        )
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        raise ConnectionRefusedError(
+            "Cannot connect to router service. Make sure it is running and envs are configured correctly"
+        )
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.error(f"Unexpected error occured: {traceback.format_exc()}")
+        # Other requests of the connection may still be running, so the socket is kept open
+        await websocket.send_json(
+            {
+                "error": "Unexpected error occured. Try again later",
+                "request_id": request_id,
+            }
+        )
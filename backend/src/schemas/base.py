@@ -36,6 +36,7 @@ class AgentDTOPayload(BaseUUIDToStrModel):
     type: AgentType
     url: Optional[AnyHttpUrl] = None
     agent_schema: dict
+    annotations: Optional[dict] = None  # MCP tool annotations, e.g. readOnlyHint
     flow: Optional[list] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
@@ -46,6 +46,21 @@ class MLResponseToFrontendDTO(BaseModel):
     agents_plan: List[AgentsPlanItem]
 
 
+class FrontendStreamEventDTO(BaseModel):
+    """
+    Progress of a master agent run, sent to the frontend before the final agent_response:
+    `request_started` (carries the request_id of a message of the frontend), `agent_selected`,
+    `agent_response`, `token` (a chunk of the answer) and `token_discard` (tokens of a
+    supervisor message that turned out not to be the final answer) events.
+    """
+
+    type: str = "agent_stream"
+    session_id: str
+    request_id: str
+    event: str
+    data: dict = {}
+
+
 class LLMProperties(BaseModel):
     provider: Optional[str] = None
     model: Optional[str] = None
@@ -96,6 +111,8 @@ class IncomingFrontendMessage(BaseModel):
     provider: str
     llm_name: str
     files: Optional[List[str]] = []
+    # Echoed back with the request_id, so the frontend can tell the events of its requests apart
+    client_request_id: Optional[str] = Field(default=None, max_length=64)
 
 
 class AgentResponseDTO(BaseModel):
@@ -12,6 +12,7 @@ class OutgoingMLRequestSchema(BaseModel):
     configs: dict
     files: Optional[List[FileDTO]] = []
     timestamp: datetime | float | int  # posix ts
+    catalogue_version: Optional[int] = None  # master agent refetches active agents once it changes
 
     @model_validator(mode="after")
     def validate_uuids(self) -> Self:
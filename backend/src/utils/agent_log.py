@@ -0,0 +1,141 @@
+import asyncio
+import contextlib
+from logging import getLogger
+from traceback import format_exc
+from typing import Optional
+
+from genai_session.utils.naming_enums import WSMessageType
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.core.settings import get_settings
+from src.db.session import async_session
+from src.models import Log
+from src.schemas.ws.log import FrontendLogEntryDTO, LogCreate, LogEntry
+from src.utils.frontend_hub import frontend_hub
+
+logger = getLogger(__name__)
+settings = get_settings()
+
+
+class AgentLogQueue:
+    """
+    Buffers agent logs in memory and writes them in batches, a single multi-row INSERT per batch,
+    instead of a transaction per log. Written logs are then published to the frontend.
+
+    A batch is written once it has `batch_size` logs or `flush_interval_ms` after its first log,
+    whichever comes first. Once `max_size` logs are pending, new logs are dropped and counted in
+    `dropped`. Waiting for room instead wouldn't slow anything down: every router message is handled
+    in a task of its own, so waiting tasks would pile up instead of logs.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.AGENT_LOG_BATCH_SIZE,
+        flush_interval_ms: int = settings.AGENT_LOG_FLUSH_INTERVAL_MS,
+        max_size: int = settings.AGENT_LOG_QUEUE_SIZE,
+        session_factory: async_sessionmaker = async_session,
+    ):
+        """
+        Args:
+            batch_size (int): Maximum number of logs written in one INSERT.
+            flush_interval_ms (int): Longest time a log waits for its batch to fill up.
+            max_size (int): Maximum number of logs waiting to be written.
+            session_factory (async_sessionmaker): Factory of the DB sessions logs are written with.
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.session_factory = session_factory
+        self._queue: asyncio.Queue[LogCreate] = asyncio.Queue(maxsize=max_size)
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Writes all pending logs and stops the writer task.
+        """
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        # Logs put from now on are written right away
+        await self._queue.join()
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    async def put(self, log_in: LogCreate) -> None:
+        """
+        Queues a log for writing, drops it if the queue is full.
+        """
+        if self._task is None:
+            await self.write([log_in])
+            return
+        try:
+            self._queue.put_nowait(log_in)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            # Warns on the first drop and then on every thousandth, not on every log
+            if self.dropped % 1000 == 1:
+                logger.warning(
+                    f"Agent log queue is full, {self.dropped} logs dropped so far"
+                )
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self.write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def write(self, batch: list[LogCreate]) -> None:
+        """
+        Inserts the logs in a single statement and publishes them to the frontend.
+        Failures are logged only, agent logs are best effort.
+        """
+        try:
+            async with self.session_factory() as db:
+                logs = await db.scalars(
+                    insert(Log).returning(Log, sort_by_parameter_order=True),
+                    [log_in.model_dump(exclude_none=True) for log_in in batch],
+                )
+                # Read before the commit expires the inserted objects
+                entries = [LogEntry(**log.__dict__) for log in logs]
+                await db.commit()
+        except Exception:
+            logger.error(f"Failed to insert {len(batch)} agent logs: {format_exc()}")
+            return
+
+        logger.debug(f"Inserted {len(entries)} agent logs")
+        # Rows are returned in the order of the batch
+        for log_in, entry in zip(batch, entries):
+            response = FrontendLogEntryDTO(
+                type=WSMessageType.AGENT_LOG.value, log=entry
+            )
+            # Only sockets of the user and session of the request get the log
+            frontend_hub.publish(
+                request_id=str(log_in.request_id),
+                session_id=str(log_in.session_id),
+                text=response.model_dump_json(),
+            )
+
+
+agent_log_queue = AgentLogQueue()
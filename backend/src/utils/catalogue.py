@@ -0,0 +1,40 @@
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from src.models import A2ACard, Agent, AgentWorkflow, CatalogueVersion, MCPServer, MCPTool
+from src.utils.change_tracking import track_changes
+
+# Everything the master agent can pick from when handling a chat message
+CATALOGUE_MODELS = (Agent, AgentWorkflow, MCPServer, MCPTool, A2ACard)
+
+
+async def get_catalogue_version(db: AsyncSession) -> Optional[int]:
+    """
+    Returns the current version of the agent catalogue. The version is sent to the master agent
+    with every chat message, the master agent fetches active agents again only once it changes.
+    None if the version row is missing, the master agent then always fetches active agents.
+    """
+    return await db.scalar(select(CatalogueVersion.version).limit(1))
+
+
+def bump_catalogue_version(session: Session) -> None:
+    """
+    Increments the catalogue version in the transaction changing the catalogue, so the new
+    version becomes visible together with the changes and never before them.
+    """
+    session.execute(
+        update(CatalogueVersion).values(version=CatalogueVersion.version + 1)
+    )
+
+
+def track_catalogue_changes() -> None:
+    """
+    Bumps the catalogue version in every transaction changing agents, flows, MCP servers/tools
+    or A2A cards, both through the unit of work and through bulk statements.
+
+    The version lives in the database, so changes made by any process count: API workers as
+    well as the Celery worker refreshing MCP servers and A2A cards.
+    """
+    track_changes(CATALOGUE_MODELS, before_commit=bump_catalogue_version)
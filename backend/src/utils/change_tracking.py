@@ -0,0 +1,65 @@
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+
+def track_changes(
+    models: tuple[type, ...],
+    on_commit: Optional[Callable[[], None]] = None,
+    before_commit: Optional[Callable[[Session], None]] = None,
+) -> None:
+    """
+    Calls `before_commit` right before a transaction changing any of the models is committed,
+    as part of that transaction, and `on_commit` once it's committed. Changes are detected both
+    through the unit of work and through bulk statements.
+
+    Args:
+        models (tuple[type, ...]): ORM models to watch.
+        on_commit (Optional[Callable[[], None]]): Called once per committed transaction changing them.
+        before_commit (Optional[Callable[[Session], None]]): Called with the session once per
+            transaction changing them, before it's committed. May execute statements.
+    """
+    # Every tracker flags sessions under a key of its own
+    flag = f"changed_{id(on_commit)}_{id(before_commit)}"
+
+    def has_pending_changes(session: Session) -> bool:
+        return any(
+            isinstance(obj, models)
+            for obj in (*session.new, *session.dirty, *session.deleted)
+        )
+
+    def mark_flush(session: Session, flush_context) -> None:
+        if has_pending_changes(session):
+            session.info[flag] = True
+
+    def mark_bulk_statement(orm_execute_state: ORMExecuteState) -> None:
+        if not (
+            orm_execute_state.is_insert
+            or orm_execute_state.is_update
+            or orm_execute_state.is_delete
+        ):
+            return
+        if any(mapper.class_ in models for mapper in orm_execute_state.all_mappers):
+            orm_execute_state.session.info[flag] = True
+
+    def call_before_commit(session: Session) -> None:
+        # Runs before the commit flushes what's still pending, so pending objects count as well
+        if session.info.get(flag) or has_pending_changes(session):
+            session.info[flag] = True
+            before_commit(session)
+
+    def call_on_commit(session: Session) -> None:
+        # Called only once committed, so that nobody caches data from before the change
+        if session.info.pop(flag, False) and on_commit:
+            on_commit()
+
+    def reset_on_rollback(session: Session, previous_transaction) -> None:
+        session.info.pop(flag, None)
+
+    event.listen(Session, "after_flush", mark_flush)
+    event.listen(Session, "do_orm_execute", mark_bulk_statement)
+    if before_commit:
+        event.listen(Session, "before_commit", call_before_commit)
+    event.listen(Session, "after_commit", call_on_commit)
+    event.listen(Session, "after_soft_rollback", reset_on_rollback)
@@ -0,0 +1,214 @@
+from collections import OrderedDict
+from typing import List, Optional
+
+from sqlalchemy import and_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models import ChatConversation, ModelConfig, ModelProvider, User
+from src.repositories.chat import chat_repo
+from src.repositories.files import files_repo
+from src.schemas.api.chat.schemas import CreateChatMessage
+from src.schemas.api.files.dto import FileDTO
+from src.schemas.ws.frontend import LLMPropertiesDecryptCreds
+from src.utils.change_tracking import track_changes
+from src.utils.enums import SenderType
+from src.utils.exceptions import ModelConfigNotFoundException
+
+
+class LLMConfigCache:
+    """
+    LRU cache of the LLM properties (with decrypted credentials) of a user's provider and config,
+    so that they aren't queried and decrypted again for every chat message.
+    Cleared whenever a transaction changing a provider or config is committed.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        # Bumped on every clear, so that properties resolved before a change are never cached
+        self.generation = 0
+        self._entries: OrderedDict[tuple, LLMPropertiesDecryptCreds] = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[LLMPropertiesDecryptCreds]:
+        entry = self._entries.get(key)
+        if entry:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(
+        self, key: tuple, properties: LLMPropertiesDecryptCreds, generation: int
+    ) -> None:
+        if generation != self.generation:
+            return
+        self._entries[key] = properties
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+
+llm_config_cache = LLMConfigCache()
+
+
+def track_llm_config_changes() -> None:
+    """
+    Clears cached LLM properties whenever providers or configs change.
+    """
+    track_changes((ModelProvider, ModelConfig), on_commit=llm_config_cache.clear)
+
+
+class ChatTurnService:
+    """
+    Database work of a chat message of the frontend, in as few statements as possible:
+        * LLM properties come from the cache, or a single query joining provider and config
+        * the chat, the files and the user message are written in one transaction
+        * the answer is appended without reloading the chat history
+    """
+
+    async def resolve_llm_properties(
+        self, db: AsyncSession, user_model: User, provider_name: str, config_name: str
+    ) -> LLMPropertiesDecryptCreds:
+        """
+        Returns the LLM properties of the user's provider and config.
+
+        Raises:
+            ModelConfigNotFoundException: If the provider or the config doesn't exist.
+            ValueError: If the api_key can't be decrypted.
+        """
+        key = (str(user_model.id), provider_name, config_name)
+        if properties := llm_config_cache.get(key):
+            return properties
+
+        generation = llm_config_cache.generation
+        # Outer join, so that a missing config can be told apart from a missing provider
+        row = (
+            await db.execute(
+                select(ModelProvider, ModelConfig)
+                .outerjoin(
+                    ModelConfig,
+                    and_(
+                        ModelConfig.name == config_name,
+                        ModelConfig.creator_id == user_model.id,
+                    ),
+                )
+                .where(
+                    and_(
+                        ModelProvider.name == provider_name,
+                        ModelProvider.creator_id == user_model.id,
+                    )
+                )
+                .limit(1)
+            )
+        ).first()
+        if not row:
+            raise ModelConfigNotFoundException(f"Provider {provider_name} does not exist")
+        provider, config = row
+        if not config:
+            raise ModelConfigNotFoundException(f"Config {config_name} does not exist")
+
+        properties = LLMPropertiesDecryptCreds(
+            config_name=config.name,
+            provider=provider.name,
+            model=config.model,
+            temperature=config.temperature,
+            system_prompt=config.system_prompt,
+            user_prompt=config.user_prompt,
+            credentials={
+                **config.credentials,
+                **provider.provider_metadata,
+                "api_key": provider.api_key,
+            },
+            max_last_messages=config.max_last_messages,
+        )
+        llm_config_cache.put(key, properties, generation=generation)
+        return properties
+
+    async def start_turn(
+        self,
+        db: AsyncSession,
+        user_model: User,
+        session_id: str,
+        request_id: str,
+        message: str,
+        file_ids: Optional[List[str]],
+    ) -> List[FileDTO]:
+        """
+        Creates the chat if it doesn't exist yet, attaches the files to the request and stores
+        the user message, in a single transaction.
+
+        Returns:
+            List of file metadata of the attached files.
+
+        Raises:
+            ValueError: If the session ID belongs to a chat of another user.
+        """
+        if not await chat_repo.chat_exists(
+            db=db, user_model=user_model, session_id=session_id
+        ):
+            # Another message of the same new session may be creating the chat concurrently,
+            # the insert then waits for it and does nothing
+            await db.execute(
+                insert(ChatConversation)
+                .values(
+                    title=message[:20] or "New Chat",
+                    creator_id=user_model.id,
+                    session_id=session_id,
+                )
+                .on_conflict_do_nothing(index_elements=[ChatConversation.session_id])
+            )
+            if not await chat_repo.chat_exists(
+                db=db, user_model=user_model, session_id=session_id
+            ):
+                await db.rollback()
+                # The session ID is taken by a chat of another user
+                raise ValueError(f"Chat with session_id '{session_id}' already exists")
+
+        files = []
+        if file_ids:
+            files = await files_repo.attach_files_to_request(
+                db=db,
+                file_ids=file_ids,
+                session_id=session_id,
+                request_id=request_id,
+                user_model=user_model,
+            )
+
+        chat_repo.add_message(
+            db=db,
+            session_id=session_id,
+            request_id=request_id,
+            message_in=CreateChatMessage(sender_type=SenderType.user, content=message),
+        )
+        await db.commit()
+        return files
+
+    async def finish_turn(
+        self,
+        db: AsyncSession,
+        session_id: str,
+        request_id: str,
+        response: str | dict,
+    ) -> List[FileDTO]:
+        """
+        Stores the answer of the master agent.
+
+        Returns:
+            List of file metadata of all files of the request, including the ones agents created.
+        """
+        chat_repo.add_message(
+            db=db,
+            session_id=session_id,
+            request_id=request_id,
+            message_in=CreateChatMessage(
+                sender_type=SenderType.master_agent, content=response
+            ),
+        )
+        # Read in the same transaction, before the commit expires the loaded files
+        files = await files_repo.list_files_by_request_id(db=db, request_id=request_id)
+        await db.commit()
+        return files
+
+
+chat_turn_service = ChatTurnService()
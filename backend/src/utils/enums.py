@@ -6,6 +6,11 @@ class AgentPlanType(Enum):
     flow = "flow"
 
 
+class RouterMessageType(Enum):
+    agent_register_batch = "agent_register_batch"
+    agent_stream = "agent_stream"
+
+
 class AgentType(Enum):
     genai = "genai"
     flow = "flow"
@@ -1,2 +1,6 @@
 class InvalidToolNameException(BaseException):
     pass
+
+
+class ModelConfigNotFoundException(Exception):
+    pass
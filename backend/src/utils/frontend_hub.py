@@ -0,0 +1,140 @@
+import asyncio
+import contextlib
+from collections import OrderedDict
+from logging import getLogger
+from typing import AsyncIterator, Optional
+
+from fastapi import WebSocket
+from src.core.settings import get_settings
+
+logger = getLogger(__name__)
+settings = get_settings()
+
+
+class FrontendSubscriber:
+    """
+    A frontend WebSocket subscribed to the events of a chat session.
+
+    Events are queued and written by a task of the subscriber, so that publishing never waits
+    for a slow socket. Once the buffer is full, the oldest events are dropped.
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: str, session_id: str, buffer_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.session_id = session_id
+        self.dropped = 0
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=buffer_size)
+
+    def offer(self, text: str) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(text)
+
+    async def run(self) -> None:
+        """
+        Writes queued events to the socket until cancelled or the socket fails.
+        """
+        while True:
+            texts = [await self._queue.get()]
+            # Everything queued in the meantime is written in one go
+            while not self._queue.empty():
+                texts.append(self._queue.get_nowait())
+            try:
+                for text in texts:
+                    await self.websocket.send_text(text)
+            except Exception as e:
+                logger.debug(f"Stopped writing events of session {self.session_id}: {e}")
+                return
+
+
+class FrontendHub:
+    """
+    Fans agent logs and master agent events out to the frontend sockets of the chat session
+    they belong to.
+
+    Events carry the request and session IDs only, so the hub remembers the user each request
+    has been sent for and delivers events to the sockets of that user and session only.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = settings.FRONTEND_WS_SEND_BUFFER,
+        max_tracked_requests: int = 100_000,
+    ):
+        """
+        Args:
+            buffer_size (int): Events buffered per socket before the oldest ones are dropped.
+            max_tracked_requests (int): Requests remembered for routing their events, the
+                oldest ones are forgotten first.
+        """
+        self.buffer_size = buffer_size
+        self.max_tracked_requests = max_tracked_requests
+        self._subscribers: dict[tuple[str, str], set[FrontendSubscriber]] = {}
+        self._requests: OrderedDict[str, tuple[str, str]] = OrderedDict()
+
+    @contextlib.asynccontextmanager
+    async def subscribe(
+        self, websocket: WebSocket, user_id: str, session_id: str
+    ) -> AsyncIterator[FrontendSubscriber]:
+        """
+        Subscribes a socket to the events of a chat session while the context is active.
+        """
+        subscriber = FrontendSubscriber(
+            websocket=websocket,
+            user_id=user_id,
+            session_id=session_id,
+            buffer_size=self.buffer_size,
+        )
+        key = (user_id, session_id)
+        self._subscribers.setdefault(key, set()).add(subscriber)
+        writer = asyncio.create_task(subscriber.run())
+        try:
+            yield subscriber
+        finally:
+            subscribers = self._subscribers.get(key, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(key, None)
+            writer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await writer
+            if subscriber.dropped:
+                logger.warning(
+                    f"Dropped {subscriber.dropped} events of session {session_id} for a slow client"
+                )
+
+    def track_request(self, request_id: str, user_id: str, session_id: str) -> None:
+        """
+        Remembers the user and session of a request sent to the master agent.
+        """
+        self._requests[request_id] = (user_id, session_id)
+        self._requests.move_to_end(request_id)
+        if len(self._requests) > self.max_tracked_requests:
+            self._requests.popitem(last=False)
+
+    def publish(self, request_id: Optional[str], session_id: Optional[str], text: str) -> int:
+        """
+        Queues an event for all sockets subscribed to the session of its request.
+
+        Args:
+            request_id (Optional[str]): Request the event belongs to.
+            session_id (Optional[str]): Session the event claims to belong to, events are
+                dropped if it doesn't match the session of the request.
+            text (str): The serialized event.
+
+        Returns:
+            int: Number of sockets the event has been queued for.
+        """
+        target = self._requests.get(request_id or "")
+        if not target or target[1] != session_id:
+            return 0
+
+        subscribers = self._subscribers.get(target, ())
+        for subscriber in subscribers:
+            subscriber.offer(text)
+        return len(subscribers)
+
+
+frontend_hub = FrontendHub()
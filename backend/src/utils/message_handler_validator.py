@@ -1,20 +1,24 @@
+import asyncio
 import traceback
 from logging import getLogger
 from traceback import format_exc
 from typing import Optional
 
-from fastapi import WebSocket
 from genai_session.session import GenAISession
 from genai_session.utils.naming_enums import ErrorType, WSMessageType
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.session import async_session
+from src.models import Agent
 from src.repositories.agent import agent_repo
 from src.repositories.flow import agentflow_repo
-from src.repositories.log import log_repo
 from src.repositories.user import user_repo
 from src.schemas.api.agent.schemas import AgentUpdate
-from src.schemas.ws.log import FrontendLogEntryDTO, LogCreate, LogEntry
-from src.utils.enums import AgentType
+from src.schemas.ws.frontend import FrontendStreamEventDTO
+from src.schemas.ws.log import LogCreate
+from src.utils.agent_log import agent_log_queue
+from src.utils.enums import AgentType, RouterMessageType
+from src.utils.frontend_hub import frontend_hub
 from src.utils.helpers import FlowValidator, generate_alias
 from src.utils.validate_uuid import validate_agent_or_send_err
 from src.utils.validation_error_handler import validation_exception_handler
@@ -23,6 +27,69 @@ from starlette.datastructures import State
 logger = getLogger(__name__)
 
 
+async def reject_agent(session: GenAISession, agent_uuid: str) -> None:
+    """
+    Tells an agent that failed validation on agent_register that it isn't registered.
+    """
+    await session.send(
+        message={
+            "error_message": "Agent ID was not registered before",
+            "error_type": ErrorType.AGENT_GENERAL_ERROR.value,
+        },
+        client_id=agent_uuid,
+        close_timeout=1,
+    )
+
+
+async def register_agent(
+    db: AsyncSession,
+    agent_uuid: str,
+    agent_name: Optional[str],
+    agent_description: Optional[str],
+    agent_input_schema: Optional[dict],
+    jwt_token: Optional[str],
+    agent_user_id: Optional[str] = None,
+) -> Optional[Agent]:
+    """
+    Validates the agent of an agent_register event and marks it as active.
+    Flows depending on the agent have to be validated by the caller, agents that fail
+    validation have to be rejected by the caller with `reject_agent`.
+    """
+    if agent_user_id:
+        valid_agent = await agent_repo.get_agent_by_creator(
+            db=db, id_=agent_uuid, creator_id=agent_user_id
+        )
+    else:
+        valid_agent = await agent_repo.validate_agent_by_jwt(db=db, agent_jwt=jwt_token)
+
+    if not valid_agent:
+        logger.debug(
+            f"Agent with '{agent_uuid}' was attempted to register but either JWT is invalid or user does not exist."  # noqa: E501
+        )
+        return None
+
+    old_name = "".join(valid_agent.alias.rsplit("_", 1)[:-1])
+    if agent_name == old_name:
+        alias = valid_agent.alias
+    else:
+        alias = generate_alias(agent_name)
+
+    agent_in = AgentUpdate(
+        id=valid_agent.id,
+        name=agent_name,
+        description=agent_description,
+        input_parameters=agent_input_schema or {},
+        is_active=True,
+        alias=alias,
+    )
+
+    return await agent_repo.update(
+        db=db,
+        db_obj=valid_agent,
+        obj_in=agent_in,
+    )
+
+
 async def message_handler_validator(
     state: State,
     session: GenAISession,
@@ -36,52 +103,28 @@ async def message_handler_validator(
     session_id: str = "",
     request_id: str = "",
     jwt_token: Optional[str] = None,
+    agent_user_id: Optional[str] = None,  # set by the router once it has verified jwt_token
+    agents: Optional[list[dict]] = None,  # registrations of agent_register_batch
+    event: Optional[str] = None,  # agent_stream event of the master agent
+    data: Optional[dict] = None,
 ):
-    # NOTE: websocket connection must be initialized by the frontend before it will be accessible here
-    # if websocket is not initialized it won't dump logs to the frontend
-    websocket: WebSocket = state.frontend_ws
-
     try:
         if message_type == WSMessageType.AGENT_REGISTER.value:
             try:
                 async with async_session() as db:
-                    valid_agent = await agent_repo.validate_agent_by_jwt(
-                        db=db, agent_jwt=jwt_token
+                    updated_agent = await register_agent(
+                        db=db,
+                        agent_uuid=agent_uuid,
+                        agent_name=agent_name,
+                        agent_description=agent_description,
+                        agent_input_schema=agent_input_schema,
+                        jwt_token=jwt_token,
+                        agent_user_id=agent_user_id,
                     )
-                    if not valid_agent:
-                        logger.debug(
-                            f"Agent with '{agent_uuid}' was attempted to register but either JWT is invalid or user does not exist."  # noqa: E501
-                        )
-                        await session.send(
-                            message={
-                                "error_message": "Agent ID was not registered before",
-                                "error_type": ErrorType.AGENT_GENERAL_ERROR.value,
-                            },
-                            client_id=agent_uuid,
-                            close_timeout=1,
-                        )
+                    if not updated_agent:
+                        await reject_agent(session=session, agent_uuid=agent_uuid)
                         return  # TODO: raise invalid agent jwt
 
-                    old_name = "".join(valid_agent.alias.rsplit("_", 1)[:-1])
-                    if agent_name == old_name:
-                        alias = valid_agent.alias
-                    else:
-                        alias = generate_alias(agent_name)
-
-                    agent_in = AgentUpdate(
-                        id=valid_agent.id,
-                        name=agent_name,
-                        description=agent_description,
-                        input_parameters=agent_input_schema or {},
-                        is_active=True,
-                        alias=alias,
-                    )
-
-                    updated_agent = await agent_repo.update(
-                        db=db,
-                        db_obj=valid_agent,
-                        obj_in=agent_in,
-                    )
                     flow_validator = FlowValidator()
                     await flow_validator.trigger_flow_validation_on_agent_state_change(
                         db=db, agent_type=AgentType.genai
@@ -100,6 +143,58 @@ async def message_handler_validator(
                 )
                 return
 
+        if message_type == RouterMessageType.agent_register_batch.value:
+            # Registrations the router has collected after a reconnect storm, flows are validated once
+            rejected = []
+            try:
+                async with async_session() as db:
+                    registered = 0
+                    for agent in agents or []:
+                        try:
+                            if await register_agent(
+                                db=db,
+                                agent_uuid=agent.get("agent_uuid"),
+                                agent_name=agent.get("agent_name", ""),
+                                agent_description=agent.get("agent_description", ""),
+                                agent_input_schema=agent.get("agent_input_schema"),
+                                jwt_token=agent.get("agent_jwt"),
+                                agent_user_id=agent.get("agent_user_id"),
+                            ):
+                                registered += 1
+                            else:
+                                rejected.append(agent.get("agent_uuid"))
+                        except ValidationError as e:
+                            logger.error(
+                                f"Invalid agent_register event request schema. Details: {validation_exception_handler(e)}"
+                            )
+                        except Exception:
+                            await db.rollback()
+                            logger.error(
+                                f"Error while registering agent. Details: {format_exc(limit=600)}"
+                            )
+
+                    if registered:
+                        flow_validator = FlowValidator()
+                        await flow_validator.trigger_flow_validation_on_agent_state_change(
+                            db=db, agent_type=AgentType.genai
+                        )
+                    logger.debug(f"Agents updated: {registered} of {len(agents or [])}")
+
+            except Exception:
+                logger.error(
+                    f"Error while registering agents. Details: {format_exc(limit=600)}"
+                )
+
+            # Sent side by side, each rejection may wait for its connection to close
+            results = await asyncio.gather(
+                *(reject_agent(session=session, agent_uuid=uuid) for uuid in rejected),
+                return_exceptions=True,
+            )
+            for rejected_uuid, result in zip(rejected, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to reject agent '{rejected_uuid}': {result}")
+            return
+
         if message_type == WSMessageType.AGENT_UNREGISTER.value:
             try:
                 agent = await validate_agent_or_send_err(agent_uuid, session=session)
@@ -139,6 +234,25 @@ async def message_handler_validator(
                 )
                 return
 
+        if message_type == RouterMessageType.agent_stream.value:
+            # Not persisted, the final response is stored once the run completes
+            if event:
+                try:
+                    response = FrontendStreamEventDTO(
+                        session_id=session_id,
+                        request_id=request_id,
+                        event=event,
+                        data=data or {},
+                    )
+                    frontend_hub.publish(
+                        request_id=request_id,
+                        session_id=session_id,
+                        text=response.model_dump_json(),
+                    )
+                except Exception:
+                    logger.error(f"Unexpected error occured: {traceback.format_exc()}")
+            return
+
         if message_type == WSMessageType.AGENT_LOG.value:
             if session_id and request_id and log_level:
                 try:
@@ -149,16 +263,8 @@ async def message_handler_validator(
                         log_level=log_level,
                         agent_id=agent_uuid,
                     )
-                    async with async_session() as db:
-                        log_entry = await log_repo.create(db, obj_in=log_in)
-                        logger.debug(f"Inserted log for {session_id=}, {request_id=}")
-                        log_out = LogEntry(**log_entry.__dict__)
-
-                        if websocket:
-                            response = FrontendLogEntryDTO(
-                                type=message_type, log=log_out
-                            )
-                            await websocket.send_text(response.model_dump_json())
+                    # Written in batches, then published to the frontend
+                    await agent_log_queue.put(log_in)
 
                 except Exception:
                     logger.error(f"Unexpected error occured: {traceback.format_exc()}")
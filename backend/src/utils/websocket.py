@@ -1,5 +1,7 @@
+import copy
 from typing import Optional
 from fastapi import Depends, Header, WebSocket, status
+from genai_session.session import GenAISession
 
 from src.auth.jwt import TokenLifespanType, validate_token
 from src.models import User
@@ -85,3 +87,18 @@ async def get_current_ws_user(
     except jwt.DecodeError:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return None
+
+
+def request_scoped_session(
+    session: GenAISession, request_id: str, session_id: str
+) -> GenAISession:
+    """
+    Returns a shallow copy of the session carrying the IDs of a single request.
+
+    GenAISession.send reads request_id and session_id from the session itself, after
+    awaiting its connection, so concurrent requests must not set them on the shared session.
+    """
+    request_session = copy.copy(session)
+    request_session.request_id = request_id
+    request_session.session_id = session_id
+    return request_session
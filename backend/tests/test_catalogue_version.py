@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+
+import pytest
+from mcp.types import Tool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from src.db.base import Base
+from src.models import CatalogueVersion, MCPServer, MCPTool, User
+from src.schemas.mcp.schemas import MCPServerData
+from src.utils import lookup_mcp_server as mcp_lookup
+from src.utils.catalogue import get_catalogue_version
+
+SERVER_URL = "http://mcp.test/mcp"
+INITIAL_VERSION = 1
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'catalogue.db'}", poolclass=NullPool
+    )
+    session_factory = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    async def create_fixtures():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            user = User(id=uuid.uuid4(), username="catalogue", password="")
+            server = MCPServer(
+                id=uuid.uuid4(), server_url=SERVER_URL, creator_id=user.id, is_active=True
+            )
+            tool = MCPTool(
+                id=uuid.uuid4(),
+                name="get_time",
+                inputSchema={"type": "object"},
+                alias="get_time",
+                mcp_server_id=server.id,
+            )
+            db.add_all(
+                [CatalogueVersion(id=1, version=INITIAL_VERSION), user, server, tool]
+            )
+            await db.commit()
+
+    asyncio.run(create_fixtures())
+    # The Celery task looks MCP servers up with the session factory of the backend
+    monkeypatch.setattr(mcp_lookup, "async_session", session_factory)
+    yield session_factory
+    asyncio.run(engine.dispose())
+
+
+def current_version(session_factory) -> int:
+    async def read():
+        async with session_factory() as db:
+            return await get_catalogue_version(db)
+
+    return asyncio.run(read())
+
+
+def run_mcp_lookup(monkeypatch, data: MCPServerData) -> None:
+    async def lookup_mcp_server(url, headers=None, cursor=None):
+        return data
+
+    monkeypatch.setattr(mcp_lookup, "lookup_mcp_server", lookup_mcp_server)
+    asyncio.run(mcp_lookup.lookup_mcp_servers())
+
+
+def test_inactive_mcp_server_bumps_catalogue_version(session_factory, monkeypatch):
+    run_mcp_lookup(monkeypatch, MCPServerData(is_active=False))
+
+    assert current_version(session_factory) > INITIAL_VERSION
+
+    async def server_is_active():
+        async with session_factory() as db:
+            return await db.scalar(select(MCPServer.is_active))
+
+    assert asyncio.run(server_is_active()) is False
+
+
+def test_refreshed_mcp_server_bumps_catalogue_version(session_factory, monkeypatch):
+    tool = Tool(name="get_time", description="Returns the time", inputSchema={"type": "object"})
+    run_mcp_lookup(
+        monkeypatch,
+        MCPServerData(is_active=True, server_url=SERVER_URL, mcp_tools=[tool]),
+    )
+
+    assert current_version(session_factory) > INITIAL_VERSION
+
+
+def test_commit_without_catalogue_changes_keeps_version(session_factory):
+    async def touch_user():
+        async with session_factory() as db:
+            user = await db.scalar(select(User))
+            user.username = "renamed"
+            await db.commit()
+
+    asyncio.run(touch_user())
+
+    assert current_version(session_factory) == INITIAL_VERSION
@@ -2,7 +2,7 @@ import { useState, useEffect, useRef, FC, useMemo } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
 import { Info, ExternalLink } from 'lucide-react';
 
-import { websocketService, AgentResponse } from '@/services/websocketService';
+import { websocketService, WebSocketMessage } from '@/services/websocketService';
 import { FileData, fileService } from '@/services/fileService';
 import {
   ChatMessage as IChatMessage,
@@ -25,6 +25,14 @@ const ChatArea: FC<ChatAreaProps> = ({ content, id, files }) => {
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const [isUploading, setIsUploading] = useState(false);
   const [isWaitingForResponse, setIsWaitingForResponse] = useState(false);
+  // Answer tokens and agent progress streamed while the master agent is running
+  const [streamedContent, setStreamedContent] = useState('');
+  const [streamedStatus, setStreamedStatus] = useState('');
+  // Only events of the latest request are streamed,
+  // its request_id comes with request_started
+  const pendingClientRequestId = useRef('');
+  const pendingRequestId = useRef('');
+  const streamedMessageId = useRef('');
   const [sessionId, setSessionId] = useState<string>('');
   const [requestId, setRequestId] = useState<string>('');
   const { messages, addMessage, setMessages } = useChatHistory();
@@ -100,15 +108,24 @@ const ChatArea: FC<ChatAreaProps> = ({ content, id, files }) => {
       })),
     };
 
+    const clientRequestId = `${Date.now()}-${Math.random()
+      .toString(36)
+      .slice(2)}`;
     const messageToSend = {
       message: content,
       llm_name: activeModel?.name,
       provider: activeModel?.provider,
+      client_request_id: clientRequestId,
       ...(files && { files: files }),
     };
 
     addMessage(newUserMessage);
     setIsWaitingForResponse(true);
+    pendingClientRequestId.current = clientRequestId;
+    pendingRequestId.current = '';
+    streamedMessageId.current = '';
+    setStreamedContent('');
+    setStreamedStatus('');
     websocketService.sendMessage(messageToSend);
   };
 
@@ -175,9 +192,55 @@ const ChatArea: FC<ChatAreaProps> = ({ content, id, files }) => {
   }, [content, files, setMessages]);
 
   useEffect(() => {
-    const handleWebSocketMessage = (response: AgentResponse) => {
+    const handleWebSocketMessage = (response: WebSocketMessage) => {
+      if (response.type === 'agent_stream') {
+        if (response.event === 'request_started') {
+          if (
+            response.data.client_request_id === pendingClientRequestId.current
+          ) {
+            pendingRequestId.current = response.request_id;
+          }
+          return;
+        }
+        // Late events of earlier requests must not end up in the pending answer
+        if (response.request_id !== pendingRequestId.current) {
+          return;
+        }
+
+        if (response.event === 'token') {
+          const messageId = response.data.message_id ?? '';
+          if (messageId !== streamedMessageId.current) {
+            // Tokens of a new supervisor message replace the previous one
+            streamedMessageId.current = messageId;
+            setStreamedContent(response.data.content ?? '');
+          } else {
+            setStreamedContent(prev => prev + (response.data.content ?? ''));
+          }
+        } else if (response.event === 'token_discard') {
+          // The message called agents, its text isn't part of the answer
+          if (response.data.message_id === streamedMessageId.current) {
+            setStreamedContent('');
+          }
+        } else if (response.event === 'agent_selected') {
+          const names = (response.data.agents ?? []).map(agent => agent.name);
+          setStreamedStatus(`Calling ${names.join(', ')}`);
+        } else if (response.event === 'agent_response') {
+          setStreamedStatus(`${response.data.name} responded`);
+        }
+        return;
+      }
+
       if (response.type === 'agent_response') {
         setIsWaitingForResponse(false);
+        if (
+          !pendingRequestId.current ||
+          response.response.request_id === pendingRequestId.current
+        ) {
+          pendingRequestId.current = '';
+          streamedMessageId.current = '';
+          setStreamedContent('');
+          setStreamedStatus('');
+        }
         setSessionId(response.response.session_id);
         setRequestId(response.response.request_id);
         const newMessage: IChatMessage = {
@@ -195,7 +258,7 @@ const ChatArea: FC<ChatAreaProps> = ({ content, id, files }) => {
         addMessage(newMessage);
       }
 
-      if (id === 'new' && response.response.session_id) {
+      if (id === 'new' && response.response?.session_id) {
         navigate(`/chat/${response.response.session_id}`);
       }
     };
@@ -226,7 +289,13 @@ const ChatArea: FC<ChatAreaProps> = ({ content, id, files }) => {
             />
           ))}
         {isWaitingForResponse && (
-          <div className="flex justify-start py-4">
+          <div className="flex flex-col items-start gap-2 py-4">
+            {streamedContent && (
+              <div className="whitespace-pre-wrap">{streamedContent}</div>
+            )}
+            {streamedStatus && !streamedContent && (
+              <span className="text-sm text-text-secondary">{streamedStatus}</span>
+            )}
             <DotsSpinner />
           </div>
         )}
@@ -111,6 +111,29 @@ export interface AgentResponse {
   };
 }
 
+// Progress of a master agent run, sent before its agent_response
+export interface AgentStreamEvent {
+  type: 'agent_stream';
+  session_id: string;
+  request_id: string;
+  event:
+    | 'request_started'
+    | 'agent_selected'
+    | 'agent_response'
+    | 'token'
+    | 'token_discard';
+  data: {
+    client_request_id?: string;
+    agents?: Array<{ name: string; args: Record<string, any> }>;
+    name?: string;
+    response?: string;
+    content?: string;
+    message_id?: string;
+  };
+}
+
+export type WebSocketMessage = AgentResponse | AgentStreamEvent;
+
 export interface AgentPlan {
   id: string;
   type: string;
@@ -130,7 +153,7 @@ export interface SubAgent {
   };
 }
 
-type MessageHandler = (message: AgentResponse) => void;
+type MessageHandler = (message: WebSocketMessage) => void;
 type ConnectionStateHandler = (isConnected: boolean) => void;
 
 class WebSocketService {
@@ -305,7 +328,7 @@ class WebSocketService {
     this.connectionStateHandlers.delete(handler);
   }
 
-  private notifyMessageHandlers(message: AgentResponse): void {
+  private notifyMessageHandlers(message: WebSocketMessage): void {
     this.messageHandlers.forEach(handler => handler(message));
   }
 
@@ -1,7 +1,10 @@
+import asyncio
 import json
 from abc import ABC, abstractmethod
-from typing import Any
+from functools import cached_property
+from typing import Any, Optional
 
+from genai_session.session import GenAISession
 from langchain.chat_models.base import BaseChatModel
 from langchain_core.messages import ToolMessage
 from langchain_core.runnables import RunnableConfig
@@ -9,20 +12,71 @@ from langgraph.constants import END, START
 from langgraph.graph.state import CompiledStateGraph, StateGraph
 from loguru import logger
 
+from config.settings import Settings
 from models.enums import Nodes
 from models.exceptions import UnknownAgentTypeException
 from models.states import MasterAgentState
+from utils.agents import agent_tools
 from utils.common import filter_and_order_by_ids, remove_last_underscore_segment
 
 
 class BaseMasterAgent(ABC):
-    def __init__(self, model: BaseChatModel, agents: list[dict[str, Any]]) -> None:
-        self.model = model
-        self.agents = agents
-        self._agents_to_bind_to_llm = [item["agent_schema"] for item in agents]
+    """
+    Master agent holding no per-request state. The model, the agents and the session of a run
+    are passed in RunnableConfig (see `run_config`), so a single instance and its compiled graph
+    are shared by all requests of the process.
+    """
+
+    @staticmethod
+    def run_config(
+            model: BaseChatModel,
+            agents: list[dict[str, Any]],
+            session: GenAISession,
+            tools: Optional[list[dict[str, Any]]] = None,
+            user_id: Optional[str] = None,
+            **kwargs
+    ) -> RunnableConfig:
+        """
+        Builds the config of a single graph run.
+
+        Args:
+            model (BaseChatModel): Langchain chat model
+            agents (list[dict[str, Any]]): List of available agents
+            session (GenAISession): Session used to invoke GenAI agents
+            tools (Optional[list[dict[str, Any]]]): Tool schemas of the agents in a stable order,
+                e.g. precomputed by `AgentCatalogue`. Built from `agents` if not given.
+            user_id (Optional[str]): User of the run, agent responses are cached per user
+            **kwargs: Other RunnableConfig keys, e.g. recursion_limit
+        """
+        return {
+            "configurable": {
+                "model": model,
+                "agents": agents,
+                "tools": tools if tools is not None else agent_tools(agents),
+                "session": session,
+                "user_id": user_id
+            },
+            **kwargs
+        }
+
+    @staticmethod
+    def get_model(config: RunnableConfig) -> BaseChatModel:
+        return config["configurable"]["model"]
+
+    @staticmethod
+    def get_agents(config: RunnableConfig) -> list[dict[str, Any]]:
+        return config["configurable"]["agents"]
+
+    @staticmethod
+    def get_tools(config: RunnableConfig) -> list[dict[str, Any]]:
+        return config["configurable"]["tools"]
+
+    @staticmethod
+    def get_user_id(config: RunnableConfig) -> Optional[str]:
+        return config["configurable"].get("user_id")
 
     @abstractmethod
-    def select_agent(self, state: MasterAgentState):
+    def select_agent(self, state: MasterAgentState, config: RunnableConfig):
         pass
 
     def should_continue(self, state: MasterAgentState):
@@ -36,16 +90,44 @@ class BaseMasterAgent(ABC):
 
     async def execute_agent(self, state: MasterAgentState, config: RunnableConfig):
         """
-        Calls remote agent selected by Supervisor using AIConnector library.
+        Calls remote agents selected by Supervisor using AIConnector library.
+        Independent agent calls of a single turn are executed concurrently, at most
+        MASTER_AGENT_MAX_CONCURRENT_AGENTS at a time.
+        """
+        tool_calls = state.messages[-1].tool_calls
+        semaphore = asyncio.Semaphore(max(1, Settings().MASTER_AGENT_MAX_CONCURRENT_AGENTS))
+
+        async def invoke(agent_call: dict[str, Any]) -> tuple[ToolMessage, dict[str, Any]]:
+            async with semaphore:
+                return await self.invoke_agent(agent_call=agent_call, state=state, config=config)
+
+        results = await asyncio.gather(*(invoke(agent_call) for agent_call in tool_calls))
+        return {
+            "messages": [message for message, _ in results],
+            "trace": [trace for _, trace in results]
+        }
+
+    async def invoke_agent(
+            self,
+            agent_call: dict[str, Any],
+            state: MasterAgentState,
+            config: RunnableConfig
+    ) -> tuple[ToolMessage, dict[str, Any]]:
         """
+        Invokes a single agent selected by Supervisor.
+
+        Returns:
+            tuple[ToolMessage, dict[str, Any]]: Response of the agent and its trace
+        """
+        from connectors.cache import response_cache
         from connectors.entities import AgentTypeEnum, GenAIConfig, GenAIFlowConfig, MCPConfig, A2AConfig
         from connectors.factory import ConnectorFactory
 
+        agents = self.get_agents(config)
         messages = state.messages
-        agent_call = messages[-1].tool_calls[0]
         agent_name = agent_call["name"]
 
-        agent_to_execute = [agent for agent in self.agents if agent["name"] == agent_name][0]
+        agent_to_execute = [agent for agent in agents if agent["name"] == agent_name][0]
         agent_type = agent_to_execute["type"]
 
         try:
@@ -62,11 +144,12 @@ class BaseMasterAgent(ABC):
                     name=remove_last_underscore_segment(agent_name),
                     agents=filter_and_order_by_ids(
                         ids=agent_to_execute.get("flow", []),
-                        items=self.agents
+                        items=agents
                     ),
-                    model=self.model,
+                    model=self.get_model(config),
                     messages=messages[:-1].copy(),  # exclude last AI message
-                    session=config.get("configurable", {}).get("session")
+                    session=config.get("configurable", {}).get("session"),
+                    user_id=self.get_user_id(config)
                 )
             elif agent_type == AgentTypeEnum.mcp.value:
                 agent_config = MCPConfig(
@@ -89,7 +172,12 @@ class BaseMasterAgent(ABC):
             connector = ConnectorFactory.get_connector(agent_config)
 
             logger.info(f"Invoking {agent_name} ({agent_type}) with parameters: {agent_call["args"]}")
-            response, trace = await connector.invoke()
+            response, trace = await response_cache.invoke(
+                connector=connector,
+                agent=agent_to_execute,
+                arguments=agent_call["args"],
+                user_id=self.get_user_id(config)
+            )
             logger.success(f"Agent {agent_name} response: {response}")
 
             agent_call_message = ToolMessage(
@@ -97,7 +185,7 @@ class BaseMasterAgent(ABC):
                 name=agent_to_execute.get("name"),
                 tool_call_id=agent_call["id"],
             )
-            return {"messages": [agent_call_message], "trace": [trace]}
+            return agent_call_message, trace
 
         except Exception as e:
             error_message = f"Unexpected error while invoking {agent_name}: {e}"
@@ -109,18 +197,22 @@ class BaseMasterAgent(ABC):
                 "output": error_message,
                 "is_success": False
             }
-            return {
-                "messages": ToolMessage(
-                    content=error_message,
-                    name=agent_to_execute.get("name")
-                ),
-                "trace": [trace]
-            }
+            return ToolMessage(
+                content=error_message,
+                name=agent_to_execute.get("name"),
+                tool_call_id=agent_call["id"]
+            ), trace
 
-    @property
+    @cached_property
     def graph(self) -> CompiledStateGraph:
         """
-        Execution graph of Master Agent.
+        Execution graph of Master Agent, compiled on first access.
+        """
+        return self.build_graph()
+
+    def build_graph(self) -> CompiledStateGraph:
+        """
+        Builds and compiles the execution graph of Master Agent.
         """
         workflow = StateGraph(MasterAgentState)
 
@@ -1,46 +1,59 @@
 from typing import Any
 
-from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from loguru import logger
 
 from agents.base import BaseMasterAgent
+from config.settings import Settings
 from models.states import MasterAgentState
+from prompts import FLOW_PLANNING_SYSTEM_PROMPT
 from utils.agents import select_agent_and_resolve_parameters
 from utils.tracing import trace_execution_time
 
 
 class FlowMasterAgent(BaseMasterAgent):
-    def __init__(
-            self,
-            model: BaseChatModel,
-            agents: list[dict[str, Any]], # ordered list of agents to execute
-    ) -> None:
-        super().__init__(model=model, agents=agents)
+    """
+    Executes the agents of a flow one after another, `agents` in RunnableConfig is the ordered
+    list of agents to execute. The position in the flow is kept in `flow_step` of the state.
+
+    With MASTER_AGENT_FLOW_PIPELINING enabled, parameters of up to MASTER_AGENT_FLOW_PLANNING_WINDOW
+    next agents are resolved in a single LLM call. Agents whose parameters don't depend on the output
+    of previous agents are then executed concurrently with them.
+    """
 
-    async def select_agent(self, state: MasterAgentState):
+    async def select_agent(self, state: MasterAgentState, config: RunnableConfig):
         messages = state.messages
+        agents = self.get_agents(config)
+        settings = Settings()
         trace = {
             "name": "MasterAgent",
             "input": messages[-1].model_dump(),
         }
 
         try:
-            if self._agents_to_bind_to_llm:
-                agent_to_execute = self._agents_to_bind_to_llm.pop(0)  # get agent from the top of the list
-                logger.info(f"Resolving parameters for {agent_to_execute.get("name")} in the flow")
+            if state.flow_step < len(agents):
+                window = self.planning_window(
+                    agents=agents,
+                    flow_step=state.flow_step,
+                    size=settings.MASTER_AGENT_FLOW_PLANNING_WINDOW
+                )
 
                 async with trace_execution_time(trace=trace):
-                    response = await select_agent_and_resolve_parameters(
-                        model=self.model,
-                        messages=messages,
-                        agents=[agent_to_execute],
-                        agent_choice=True  # force the current agent to be called
-                    )
-
-                logger.success(
-                    f"Agent {agent_to_execute.get('name')} will be executed with args {response.tool_calls[0]["args"]}"
-                )
+                    response = None
+                    if settings.MASTER_AGENT_FLOW_PIPELINING and len(window) > 1:
+                        response = await self.plan_steps(config=config, messages=messages, window=window)
+                    if response is None:
+                        logger.info(f"Resolving parameters for {window[0]["name"]} in the flow")
+                        response = await select_agent_and_resolve_parameters(
+                            model=self.get_model(config),
+                            messages=messages,
+                            agents=[window[0]["agent_schema"]],  # get the next agent of the flow
+                            agent_choice=True  # force the current agent to be called
+                        )
+
+                for tool_call in response.tool_calls:
+                    logger.success(f"Agent {tool_call["name"]} will be executed with args {tool_call["args"]}")
 
                 trace.update(
                     {
@@ -48,7 +61,11 @@ class FlowMasterAgent(BaseMasterAgent):
                         "is_success": True
                     }
                 )
-                return {"messages": [response], "trace": [trace]}
+                return {
+                    "messages": [response],
+                    "trace": [trace],
+                    "flow_step": state.flow_step + len(response.tool_calls)
+                }
 
         except Exception as e:
             error_message = f"Unexpected error while resolving parameters for agent in the flow: {e}"
@@ -61,3 +78,72 @@ class FlowMasterAgent(BaseMasterAgent):
                 "is_success": False
             }
             return {"messages": [AIMessage(content=error_message)], "trace": [trace]}
+
+    @staticmethod
+    def planning_window(agents: list[dict[str, Any]], flow_step: int, size: int) -> list[dict[str, Any]]:
+        """
+        Returns the next agents of the flow whose parameters may be resolved in a single LLM call.
+
+        Tool names have to be unique within an LLM call, so the window ends before the first agent
+        it already contains. The repeated agent is resolved in a later step.
+
+        Args:
+            agents (list[dict[str, Any]]): Agents of the flow, in the flow order
+            flow_step (int): Index of the next agent to execute
+            size (int): Maximum number of agents in the window, at least one is returned
+
+        Returns:
+            list[dict[str, Any]]: Agents of the window, in the flow order
+        """
+        window = []
+        names = set()
+        for agent in agents[flow_step:flow_step + max(1, size)]:
+            if agent["name"] in names:
+                break
+            names.add(agent["name"])
+            window.append(agent)
+        return window
+
+    async def plan_steps(
+            self,
+            config: RunnableConfig,
+            messages: list[BaseMessage],
+            window: list[dict[str, Any]]
+    ) -> AIMessage | None:
+        """
+        Resolves parameters of the next agents of the flow in a single LLM call.
+
+        Args:
+            config (RunnableConfig): Config of the run
+            messages (list[BaseMessage]): Messages so far
+            window (list[dict[str, Any]]): Next agents of the flow, in the flow order
+
+        Returns:
+            AIMessage | None: Response calling the leading agents of the window that can run right away,
+                None if the LLM didn't call the next agent of the flow first
+        """
+        logger.info(f"Resolving parameters for the next {len(window)} agents in the flow")
+        response = await select_agent_and_resolve_parameters(
+            model=self.get_model(config),
+            messages=[*messages, SystemMessage(content=FLOW_PLANNING_SYSTEM_PROMPT)],
+            agents=[agent["agent_schema"] for agent in window],
+            agent_choice=True,
+            parallel_tool_calls=True
+        )
+
+        # Only calls following the flow order are kept, the rest is resolved again in later steps
+        planned = []
+        for agent, tool_call in zip(window, response.tool_calls):
+            if tool_call["name"] != agent["name"]:
+                break
+            planned.append(tool_call)
+
+        if not planned:
+            logger.warning("Flow planning didn't call the next agent of the flow, resolving it alone")
+            return None
+
+        additional_kwargs = {k: v for k, v in response.additional_kwargs.items() if k != "tool_calls"}
+        return response.model_copy(update={"tool_calls": planned, "additional_kwargs": additional_kwargs})
+
+
+flow_master_agent = FlowMasterAgent()
@@ -1,33 +1,27 @@
-from typing import Any
-
-from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 from loguru import logger
 
 from agents.base import BaseMasterAgent
+from config.settings import Settings
 from models.states import MasterAgentState
 from utils.agents import select_agent_and_resolve_parameters
 from utils.tracing import trace_execution_time
 
 
 class ReActMasterAgent(BaseMasterAgent):
-    def __init__(
-            self,
-            model: BaseChatModel,
-            agents: list[dict[str, Any]]
-    ) -> None:
-        """
-        Supervisor agent building on top of ReAct framework to automatically execute available agents and flows.
-        ReAct framework allows to continuously call tools (remote agents in this case) to complete task assigned by user.
+    """
+    Supervisor agent building on top of ReAct framework to automatically execute available agents and flows.
+    ReAct framework allows to continuously call tools (remote agents in this case) to complete task assigned by user.
+    With MASTER_AGENT_PARALLEL_TOOL_CALLS enabled, the model may select several independent agents in one turn.
 
-        Args:
-            model (BaseChatModel): Langchain chat model (preferably OpenAI or Azure OpenAI)
-            agents (list[dict[str, Any]]): List of available agents
-        """
-        super().__init__(model, agents)
-        self._agents_to_bind_to_llm = [item["agent_schema"] for item in agents]
+    Expects in RunnableConfig (see `run_config`):
+        model (BaseChatModel): Langchain chat model (preferably OpenAI or Azure OpenAI)
+        agents (list[dict[str, Any]]): List of available agents
+        session (GenAISession): Session used to invoke GenAI agents
+    """
 
-    async def select_agent(self, state: MasterAgentState):
+    async def select_agent(self, state: MasterAgentState, config: RunnableConfig):
         """
         Selects agent/flow to execute, determine input parameters for the agent/flow.
         Acts as main supervisor node.
@@ -42,14 +36,15 @@ class ReActMasterAgent(BaseMasterAgent):
         try:
             async with trace_execution_time(trace=trace):
                 response = await select_agent_and_resolve_parameters(
-                    model=self.model,
+                    model=self.get_model(config),
                     messages=messages,
-                    agents=self._agents_to_bind_to_llm
+                    agents=self.get_tools(config),
+                    parallel_tool_calls=Settings().MASTER_AGENT_PARALLEL_TOOL_CALLS
                 )
 
-            if response.tool_calls:
-                logger.success(f"Selected {response.tool_calls[0]["name"]} with args {response.tool_calls[0]["args"]}")
-            else:
+            for tool_call in response.tool_calls:
+                logger.success(f"Selected {tool_call["name"]} with args {tool_call["args"]}")
+            if not response.tool_calls:
                 logger.success(f"No agent is selected, generating final response")
 
             trace.update(
@@ -71,3 +66,6 @@ class ReActMasterAgent(BaseMasterAgent):
                 "is_success": False
             }
             return {"messages": [AIMessage(content=error_message)],"trace": [trace]}
+
+
+react_master_agent = ReActMasterAgent()
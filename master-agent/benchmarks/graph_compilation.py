@@ -0,0 +1,76 @@
+"""
+Compares compiling the Master Agent graph for every request with reusing the graph compiled once per process.
+
+Run from the master-agent directory:
+    python -m benchmarks.graph_compilation
+"""
+
+import asyncio
+import itertools
+import time
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from loguru import logger
+
+from agents.react_master_agent import react_master_agent
+
+ITERATIONS = 200
+
+
+class FakeChatModel(GenericFakeChatModel):
+    """
+    Chat model answering right away without selecting any agent, so only the graph overhead is measured.
+    """
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def build_agents(count: int) -> list[dict]:
+    return [
+        {
+            "id": str(i),
+            "name": f"agent_{i}",
+            "type": "genai",
+            "agent_schema": {
+                "type": "function",
+                "function": {"name": f"agent_{i}", "description": "", "parameters": {}},
+            },
+        }
+        for i in range(count)
+    ]
+
+
+async def run(compile_per_request: bool) -> float:
+    model = FakeChatModel(messages=itertools.repeat(AIMessage(content="done")))
+    config = react_master_agent.run_config(model=model, agents=build_agents(20), session=None)
+    messages = [SystemMessage(content="system"), HumanMessage(content="hello")]
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        graph = react_master_agent.build_graph() if compile_per_request else react_master_agent.graph
+        await graph.ainvoke(input={"messages": messages}, config=config)
+    return (time.perf_counter() - start) / ITERATIONS
+
+
+async def main():
+    logger.remove()
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        react_master_agent.build_graph()
+    compile_time = (time.perf_counter() - start) / ITERATIONS
+
+    per_request = await run(compile_per_request=True)
+    reused = await run(compile_per_request=False)
+
+    print(f"{'compile only (ms)':>18} | {'compiled per request (ms)':>25} | {'reused (ms)':>11} | speedup")
+    print(
+        f"{compile_time * 1000:>18.3f} | {per_request * 1000:>25.3f} | {reused * 1000:>11.3f} "
+        f"| {per_request / reused:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -24,4 +24,50 @@ class Settings(BaseSettings):
     SECRET_KEY: str = Field(
         default="GenAI-ddc5e9f5-c340-4dcc-9872-d7f098b6b172",
         alias="SECRET_KEY"
-    )
\ No newline at end of file
+    )
+
+    # Shared HTTP client
+    HTTP_MAX_CONNECTIONS: int = Field(default=100, alias="HTTP_MAX_CONNECTIONS")
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        default=20, alias="HTTP_MAX_KEEPALIVE_CONNECTIONS"
+    )
+    HTTP_KEEPALIVE_EXPIRY: float = Field(default=30.0, alias="HTTP_KEEPALIVE_EXPIRY")
+
+    # Chat models reused across requests with the same LLM configuration
+    LLM_POOL_SIZE: int = Field(default=32, alias="LLM_POOL_SIZE")
+
+    # Only the agents most relevant to the user message are bound to the LLM, 0 binds all agents
+    AGENT_PRESELECTION_TOP_K: int = Field(default=20, alias="AGENT_PRESELECTION_TOP_K")
+
+    # Agent execution
+    MASTER_AGENT_PARALLEL_TOOL_CALLS: bool = Field(
+        default=False, alias="MASTER_AGENT_PARALLEL_TOOL_CALLS"
+    )
+    MASTER_AGENT_MAX_CONCURRENT_AGENTS: int = Field(
+        default=4, alias="MASTER_AGENT_MAX_CONCURRENT_AGENTS"
+    )
+    MASTER_AGENT_FLOW_PIPELINING: bool = Field(
+        default=False, alias="MASTER_AGENT_FLOW_PIPELINING"
+    )
+    MASTER_AGENT_FLOW_PLANNING_WINDOW: int = Field(
+        default=4, alias="MASTER_AGENT_FLOW_PLANNING_WINDOW"
+    )
+
+    # Responses of agents safe to call repeatedly, see connectors/cache.py
+    AGENT_RESPONSE_CACHE_ENABLED: bool = Field(
+        default=False, alias="AGENT_RESPONSE_CACHE_ENABLED"
+    )
+    AGENT_RESPONSE_CACHE_TTL: float = Field(
+        default=300.0, alias="AGENT_RESPONSE_CACHE_TTL"
+    )
+    AGENT_RESPONSE_CACHE_TTLS: dict[str, float] = Field(
+        default={}, alias="AGENT_RESPONSE_CACHE_TTLS"
+    )
+    AGENT_RESPONSE_CACHE_MAX_BYTES: int = Field(
+        default=64 * 1024 * 1024, alias="AGENT_RESPONSE_CACHE_MAX_BYTES"
+    )
+
+    # Selected agents, agent responses and final answer tokens are streamed to the frontend during a run
+    MASTER_AGENT_STREAM_EVENTS: bool = Field(
+        default=True, alias="MASTER_AGENT_STREAM_EVENTS"
+    )
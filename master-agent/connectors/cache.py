@@ -0,0 +1,141 @@
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from loguru import logger
+
+from config.settings import Settings
+from connectors.entities import AgentTypeEnum, ConnectorStrategy
+from utils.common import remove_last_underscore_segment
+
+
+@dataclass
+class CachedResponse:
+    response: Any
+    trace: dict[str, Any]
+    expires_at: float
+    size: int
+
+
+class ResponseCache:
+    """
+    Opt-in LRU cache of agent responses, keyed by agent, arguments and user, so that repeated calls
+    with the same arguments (a common ReAct pattern) don't cost a full round trip.
+
+    Only calls known to be safe to repeat are cached:
+        * MCP tools annotated with `readOnlyHint` or `idempotentHint`, for the default TTL
+        * Agents listed in the per-agent TTLs, by ID or by name
+    Flows and failed calls are never cached.
+    """
+
+    def __init__(
+            self,
+            enabled: bool,
+            default_ttl: float,
+            agent_ttls: dict[str, float],
+            max_bytes: int
+    ):
+        """
+        Args:
+            enabled (bool): Whether responses are cached at all
+            default_ttl (float): Seconds responses of annotated MCP tools are cached for
+            agent_ttls (dict[str, float]): Seconds responses are cached for by agent ID or name, 0 disables caching
+            max_bytes (int): Maximum size of cached responses, least recently used ones are evicted first
+        """
+        self.enabled = enabled
+        self.default_ttl = default_ttl
+        self.agent_ttls = agent_ttls
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+
+    def ttl_for(self, agent: dict[str, Any]) -> float:
+        """
+        Returns seconds responses of the agent may be cached for, 0 if they must not be cached.
+        """
+        if agent.get("type") == AgentTypeEnum.flow.value:
+            return 0
+
+        for agent_key in (agent.get("id"), agent.get("name"), remove_last_underscore_segment(agent.get("name", ""))):
+            if agent_key in self.agent_ttls:
+                return self.agent_ttls[agent_key]
+
+        annotations = agent.get("annotations") or {}
+        if agent.get("type") == AgentTypeEnum.mcp.value and (
+                annotations.get("readOnlyHint") or annotations.get("idempotentHint")
+        ):
+            return self.default_ttl
+        return 0
+
+    @staticmethod
+    def key(agent_id: str, arguments: dict[str, Any], user_id: Optional[str]) -> str:
+        # Sorted keys, so that arguments differing only in order share an entry
+        return json.dumps([agent_id, user_id, arguments], sort_keys=True, separators=(",", ":"), default=str)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, response: Any, trace: dict[str, Any], ttl: float) -> None:
+        size = len(key) + len(json.dumps(response, default=str))
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._evict(key)
+        self._entries[key] = CachedResponse(
+            response=response,
+            trace=trace,
+            expires_at=time.monotonic() + ttl,
+            size=size
+        )
+        self.size += size
+        while self.size > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str) -> None:
+        self.size -= self._entries.pop(key).size
+
+    async def invoke(
+            self,
+            connector: ConnectorStrategy,
+            agent: dict[str, Any],
+            arguments: dict[str, Any],
+            user_id: Optional[str]
+    ) -> tuple[Any, dict[str, Any]]:
+        """
+        Invokes the connector, unless a response for the same agent, arguments and user is cached.
+
+        Returns:
+            tuple[Any, dict[str, Any]]: The response and its trace, marked with `cache_hit`
+        """
+        ttl = self.ttl_for(agent) if self.enabled else 0
+        if ttl <= 0:
+            return await connector.invoke()
+
+        key = self.key(agent_id=agent.get("id"), arguments=arguments, user_id=user_id)
+        if entry := self.get(key):
+            logger.info(f"Using cached response of {agent.get('name')}")
+            return entry.response, {**entry.trace, "execution_time": 0, "cache_hit": True}
+
+        response, trace = await connector.invoke()
+        if trace.get("is_success"):
+            self.put(key, response=response, trace=trace, ttl=ttl)
+        return response, {**trace, "cache_hit": False}
+
+
+settings = Settings()
+response_cache = ResponseCache(
+    enabled=settings.AGENT_RESPONSE_CACHE_ENABLED,
+    default_ttl=settings.AGENT_RESPONSE_CACHE_TTL,
+    agent_ttls=settings.AGENT_RESPONSE_CACHE_TTLS,
+    max_bytes=settings.AGENT_RESPONSE_CACHE_MAX_BYTES
+)
@@ -2,14 +2,12 @@ import uuid
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import Any, Optional
 
 from genai_session.session import GenAISession
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage
 
-from agents.flow_master_agent import FlowMasterAgent
-
 
 class AgentTypeEnum(Enum):
     a2a = "a2a"
@@ -63,14 +61,10 @@ class GenAIFlowConfig(AgentConfig):
     model: BaseChatModel
     messages: list[BaseMessage]
     session: GenAISession
-    flow_master_agent: FlowMasterAgent = field(init=False)
+    user_id: Optional[str] = None
 
     def __post_init__(self):
         self.agent_type = AgentTypeEnum.flow.value
-        self.flow_master_agent = FlowMasterAgent(
-            model=self.model,
-            agents=self.agents
-        )
 
 
 class ConnectorStrategy(ABC):
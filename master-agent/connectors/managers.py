@@ -3,12 +3,13 @@ from typing import Any, cast
 from a2a.client import A2AClient
 from a2a.types import MessageSendParams, SendMessageRequest, SendMessageSuccessResponse
 from genai_session.session import GenAISession
-from httpx import AsyncClient
 from loguru import logger
 from mcp.client.session import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
 
+from agents.flow_master_agent import flow_master_agent
 from connectors.entities import ConnectorStrategy, A2AConfig, GenAIConfig, MCPConfig, GenAIFlowConfig
+from utils.http import get_http_client
 from utils.tracing import trace_execution_time
 
 
@@ -66,43 +67,42 @@ class A2AConnector(ConnectorStrategy):
             "input": config.action,
         }
         try:
-            async with AsyncClient() as httpx_client:
-                client = await A2AClient.get_client_from_agent_card_url(
-                    httpx_client, config.endpoint
-                )
+            client = await A2AClient.get_client_from_agent_card_url(
+                get_http_client(), config.endpoint
+            )
 
-                send_message_payload: dict[str, Any] = {
-                    "message": {
-                        "role": config.role,
-                        "messageId": config.message_id,
-                        "parts": [
-                            {
-                                "type": "text",
-                                "text": config.action
-                            }
-                        ],
-                    },
-                }
-                request = SendMessageRequest(
-                    params=MessageSendParams(**send_message_payload)
-                )
+            send_message_payload: dict[str, Any] = {
+                "message": {
+                    "role": config.role,
+                    "messageId": config.message_id,
+                    "parts": [
+                        {
+                            "type": "text",
+                            "text": config.action
+                        }
+                    ],
+                },
+            }
+            request = SendMessageRequest(
+                params=MessageSendParams(**send_message_payload)
+            )
 
-                async with trace_execution_time(trace=trace):
-                    response = await client.send_message(request, http_kwargs={"timeout": None})
+            async with trace_execution_time(trace=trace):
+                response = await client.send_message(request, http_kwargs={"timeout": None})
 
-                if isinstance(response.root, SendMessageSuccessResponse):
-                    response_text = response.root.result.artifacts[0].parts[0].root.text
-                else:
-                    response_text = response.root.error.message
+            if isinstance(response.root, SendMessageSuccessResponse):
+                response_text = response.root.result.artifacts[0].parts[0].root.text
+            else:
+                response_text = response.root.error.message
 
-                trace.update(
-                    {
-                        "output": response.model_dump(mode="json"),
-                        "is_success": isinstance(response.root, SendMessageSuccessResponse)
-                    }
-                )
+            trace.update(
+                {
+                    "output": response.model_dump(mode="json"),
+                    "is_success": isinstance(response.root, SendMessageSuccessResponse)
+                }
+            )
 
-                return response_text, trace
+            return response_text, trace
 
         except Exception as e:
             error_message = f"Unexpected error while invoking A2A agent: {e}"
@@ -170,9 +170,14 @@ class GenAIFlowConnector(ConnectorStrategy):
         }
 
         async with trace_execution_time(trace=trace):
-            final_state = await config.flow_master_agent.graph.ainvoke(
+            final_state = await flow_master_agent.graph.ainvoke(
                 input={"messages": config.messages.copy()},
-                config={"configurable": {"session": session}}
+                config=flow_master_agent.run_config(
+                    model=config.model,
+                    agents=config.agents,
+                    session=session,
+                    user_id=config.user_id
+                )
             )
 
         response = final_state["messages"][-1].content
@@ -1,5 +1,29 @@
-from langchain_openai import ChatOpenAI
+from typing import Any, AsyncIterator, Iterator
+
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_openai import AzureChatOpenAI, ChatOpenAI
 
 
 class ChatGenAI(ChatOpenAI):
     pass
+
+
+class AzureChatOpenAIWithUsage(AzureChatOpenAI):
+    """
+    AzureChatOpenAI that asks for token usage in streamed responses, like ChatOpenAI with
+    stream_usage=True, which langchain-openai only supports for ChatOpenAI.
+    Requires an Azure OpenAI API version supporting stream_options (2024-09-01-preview or later).
+    """
+
+    stream_usage: bool = True
+
+    def _stream(self, *args: Any, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if self.stream_usage:
+            kwargs.setdefault("stream_options", {"include_usage": True})
+        yield from super()._stream(*args, **kwargs)
+
+    async def _astream(self, *args: Any, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if self.stream_usage:
+            kwargs.setdefault("stream_options", {"include_usage": True})
+        async for chunk in super()._astream(*args, **kwargs):
+            yield chunk
@@ -1,14 +1,23 @@
+import hashlib
+from collections import OrderedDict
 from typing import Any
 
 from langchain_core.language_models import BaseChatModel
 from langchain_ollama import ChatOllama
-from langchain_openai import ChatOpenAI, AzureChatOpenAI
+from langchain_openai import ChatOpenAI
 
-from llms.custom import ChatGenAI
+from config.settings import Settings
+from llms.custom import AzureChatOpenAIWithUsage, ChatGenAI
 
 
 class LLMFactory:
+    """
+    Creates chat models by provider. Models are pooled by their configuration, so that requests
+    with the same LLM configuration reuse a model and the HTTP connections of its client.
+    """
+
     _registry = {}
+    _pool: OrderedDict[tuple, BaseChatModel] = OrderedDict()
 
     @classmethod
     def register(cls, name: str):
@@ -26,7 +35,32 @@ class LLMFactory:
         if not constructor:
             raise ValueError(f"Unknown LLM provider: {llm_provider}")
 
-        return constructor(configs)
+        key = cls.pool_key(configs)
+        if (model := cls._pool.get(key)) is not None:
+            cls._pool.move_to_end(key)
+            return model
+
+        model = constructor(configs)
+        cls._pool[key] = model
+        if len(cls._pool) > Settings().LLM_POOL_SIZE:
+            cls._pool.popitem(last=False)
+        return model
+
+    @staticmethod
+    def pool_key(configs: dict[str, Any]) -> tuple:
+        """
+        Key of a model in the pool, API keys are hashed so that they aren't kept in plain text twice.
+        """
+        api_key = configs.get("api_key") or ""
+        return (
+            configs.get("provider", "").lower(),
+            configs.get("endpoint"),
+            configs.get("base_url"),
+            configs.get("api_version"),
+            hashlib.sha256(api_key.encode()).hexdigest(),
+            configs.get("model"),
+            configs.get("temperature"),
+        )
 
 
 @LLMFactory.register("openai")
@@ -34,13 +68,15 @@ def __create_openai_model(configs: dict[str, Any]) -> ChatOpenAI:
     return ChatOpenAI(
         api_key=configs.get("api_key"),
         model=configs.get("model"),
-        temperature=configs.get("temperature")
+        temperature=configs.get("temperature"),
+        # Streamed responses only carry usage_metadata, needed for token accounting, if asked for
+        stream_usage=True
     )
 
 
 @LLMFactory.register("azure openai")
-def __create_azure_openai_model(configs: dict[str, Any]) -> AzureChatOpenAI:
-    return AzureChatOpenAI(
+def __create_azure_openai_model(configs: dict[str, Any]) -> AzureChatOpenAIWithUsage:
+    return AzureChatOpenAIWithUsage(
         azure_endpoint=configs.get("endpoint"),
         api_key=configs.get("api_key"),
         api_version=configs.get("api_version"),
@@ -6,13 +6,16 @@ from genai_session.utils.context import GenAIContext
 from langchain_core.messages import SystemMessage
 from loguru import logger
 
-from agents.react_master_agent import ReActMasterAgent
+from agents.react_master_agent import react_master_agent
 from config.settings import Settings
 from llms import LLMFactory
 from prompts import FILE_RELATED_SYSTEM_PROMPT
-from utils.agents import get_agents
+from utils.agents import get_agent_catalogue
 from utils.chat_history import get_chat_history
-from utils.common import attach_files_to_message
+from utils.common import attach_files_to_message, message_text
+from utils.http import close_http_client
+from utils.session import request_scoped_session
+from utils.streaming import RunEventStream, stream_run
 
 app_settings = Settings()
 
@@ -29,47 +32,80 @@ async def receive_message(
         user_id: str,
         configs: dict[str, Any],
         files: Optional[list[dict[str, Any]]],
-        timestamp: str
+        timestamp: str,
+        catalogue_version: Optional[int] = None
 ):
+    events = RunEventStream(
+        websocket=agent_context.websocket,
+        session_id=session_id,
+        request_id=agent_context.request_id
+    )
     try:
-        graph_config = {"configurable": {"session": session}, "recursion_limit": 100}  # recursion_limit can be adjusted
-
         base_system_prompt = configs.get("system_prompt")
         user_system_prompt = configs.get("user_prompt")
 
         system_prompt = user_system_prompt or base_system_prompt
         system_prompt = f"{system_prompt}\n\n{FILE_RELATED_SYSTEM_PROMPT}"
 
-        chat_history = await get_chat_history(
-            f"{app_settings.BACKEND_API_URL}/chat",
-            session_id=session_id,
-            user_id=user_id,
-            api_key=app_settings.MASTER_BE_API_KEY,
-            max_last_messages=configs.get("max_last_messages", 5)
+        # Both come from the backend and don't depend on each other
+        chat_history, catalogue = await asyncio.gather(
+            get_chat_history(
+                f"{app_settings.BACKEND_API_URL}/chat",
+                session_id=session_id,
+                user_id=user_id,
+                api_key=app_settings.MASTER_BE_API_KEY,
+                max_last_messages=configs.get("max_last_messages", 5)
+            ),
+            get_agent_catalogue(
+                url=f"{app_settings.BACKEND_API_URL}/agents/active",
+                agent_type="all",
+                api_key=app_settings.MASTER_BE_API_KEY,
+                user_id=user_id,
+                catalogue_version=catalogue_version
+            )
         )
 
+        user_message = message_text(chat_history[-1])
         chat_history[-1] = attach_files_to_message(message=chat_history[-1], files=files) if files else chat_history[-1]
+        # System prompt first and the same tool list for every step keep the start of each
+        # LLM request identical, so that provider-side prompt caching can reuse it
         init_messages = [
             SystemMessage(content=system_prompt),
             *chat_history
         ]
 
-        agents = await get_agents(
-            url=f"{app_settings.BACKEND_API_URL}/agents/active",
-            agent_type="all",
-            api_key=app_settings.MASTER_BE_API_KEY,
-            user_id=user_id
-        )
-
         llm = LLMFactory.create(configs=configs)
-        master_agent = ReActMasterAgent(model=llm, agents=agents)
+        graph_config = react_master_agent.run_config(
+            model=llm,
+            agents=catalogue.agents,
+            tools=catalogue.candidate_tools(
+                text=user_message,
+                top_k=app_settings.AGENT_PRESELECTION_TOP_K
+            ),
+            # The shared session is updated by every request while this one runs
+            session=request_scoped_session(
+                session,
+                request_id=agent_context.request_id,
+                session_id=session_id
+            ),
+            user_id=user_id,
+            recursion_limit=100  # recursion_limit can be adjusted
+        )
 
         logger.info("Running Master Agent")
 
-        final_state = await master_agent.graph.ainvoke(
-            input={"messages": init_messages},
-            config=graph_config
-        )
+        if app_settings.MASTER_AGENT_STREAM_EVENTS:
+            final_state = await stream_run(
+                graph=react_master_agent.graph,
+                input={"messages": init_messages},
+                config=graph_config,
+                events=events
+            )
+        else:
+            final_state = await react_master_agent.graph.ainvoke(
+                input={"messages": init_messages},
+                config=graph_config
+            )
 
         response = final_state["messages"][-1].content
 
@@ -91,7 +127,10 @@ async def receive_message(
 
 async def main():
     logger.info("Master Agent started")
-    await session.process_events()
+    try:
+        await session.process_events()
+    finally:
+        await close_http_client()
 
 
 if __name__ == "__main__":
@@ -9,3 +9,4 @@ from pydantic import BaseModel
 class MasterAgentState(BaseModel):
     messages: Annotated[list[BaseMessage], add_messages]
     trace: Annotated[list[dict[str, Any]], operator.add]
+    flow_step: int = 0  # index of the next agent to execute in a flow
@@ -1 +1 @@
-from prompts.prompts import FILE_RELATED_SYSTEM_PROMPT  # noqa: F401
+from prompts.prompts import FILE_RELATED_SYSTEM_PROMPT, FLOW_PLANNING_SYSTEM_PROMPT  # noqa: F401
@@ -16,4 +16,11 @@ NOTE: it's just an example of file structure, not a real file.
 
 If any tool requires a file (or files) as input, pass file ID (or list of file IDs).
 Use files metadata to correctly select the tool and the file.
-"""
\ No newline at end of file
+"""
+
+FLOW_PLANNING_SYSTEM_PROMPT = """
+You are executing a flow: the tools available to you are the next steps of the flow, in the order they must be executed.
+Call the first tool. In the same response, also call each following tool, in the flow order, as long as all of its
+parameters can be resolved from the conversation so far, without the output of any earlier step.
+Stop at the first tool that needs the output of a previous step, it will be called once that output is known.
+"""
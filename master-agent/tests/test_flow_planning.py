@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.flow_master_agent import flow_master_agent
+from models.states import MasterAgentState
+
+
+class RecordingChatModel(GenericFakeChatModel):
+    """
+    Chat model answering with the given messages and recording the tool names bound to every call.
+    """
+
+    bound_tool_names: list[list[str]] = []
+
+    def bind_tools(self, tools, **kwargs):
+        self.bound_tool_names.append([tool["function"]["name"] for tool in tools])
+        return self
+
+
+def build_agent(name: str) -> dict:
+    return {
+        "id": name,
+        "name": name,
+        "type": "genai",
+        "agent_schema": {
+            "type": "function",
+            "function": {"name": name, "description": "", "parameters": {}},
+        },
+    }
+
+
+def tool_calls(*names: str) -> AIMessage:
+    return AIMessage(
+        content="",
+        tool_calls=[{"name": name, "args": {}, "id": f"call_{i}"} for i, name in enumerate(names)]
+    )
+
+
+@pytest.fixture(autouse=True)
+def flow_pipelining(monkeypatch):
+    monkeypatch.setenv("MASTER_AGENT_FLOW_PIPELINING", "true")
+    monkeypatch.setenv("MASTER_AGENT_FLOW_PLANNING_WINDOW", "4")
+
+
+def test_planning_window_ends_before_repeated_agent():
+    agents = [build_agent(name) for name in ("fetch", "translate", "fetch", "summarize")]
+
+    window = flow_master_agent.planning_window(agents=agents, flow_step=0, size=4)
+    assert [agent["name"] for agent in window] == ["fetch", "translate"]
+
+    window = flow_master_agent.planning_window(agents=agents, flow_step=2, size=4)
+    assert [agent["name"] for agent in window] == ["fetch", "summarize"]
+
+
+def test_flow_repeating_an_agent_binds_unique_tool_names():
+    agents = [build_agent(name) for name in ("fetch", "translate", "fetch", "summarize")]
+    model = RecordingChatModel(
+        messages=iter([tool_calls("fetch", "translate"), tool_calls("fetch", "summarize")]),
+        bound_tool_names=[]
+    )
+    config = flow_master_agent.run_config(model=model, agents=agents, session=None)
+
+    async def run_steps():
+        state = MasterAgentState(messages=[HumanMessage(content="hello")], trace=[])
+        first = await flow_master_agent.select_agent(state, config)
+        state.flow_step = first["flow_step"]
+        second = await flow_master_agent.select_agent(state, config)
+        return first, second
+
+    first, second = asyncio.run(run_steps())
+
+    assert model.bound_tool_names == [["fetch", "translate"], ["fetch", "summarize"]]
+    assert [call["name"] for call in first["messages"][0].tool_calls] == ["fetch", "translate"]
+    assert first["flow_step"] == 2
+    assert [call["name"] for call in second["messages"][0].tool_calls] == ["fetch", "summarize"]
+    assert second["flow_step"] == 4
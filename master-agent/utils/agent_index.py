@@ -0,0 +1,131 @@
+import hashlib
+import math
+import re
+from collections import Counter
+from typing import Any, Optional
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits text into lowercase words, camelCase and snake_case names are split into their parts.
+    """
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def agent_text(agent: dict[str, Any]) -> str:
+    """
+    Text an agent is matched by: its name, description and the names and descriptions of its parameters.
+    """
+    schema = agent.get("agent_schema", {})
+    function = schema.get("function", schema)
+    # Agent names end with the agent ID, which would only add noise
+    name = (function.get("name") or agent.get("name") or "").rsplit("_", 1)[0]
+    parts = [name, function.get("description") or agent.get("description") or ""]
+    for parameter, parameter_schema in (function.get("parameters") or {}).get("properties", {}).items():
+        parts.append(parameter)
+        if isinstance(parameter_schema, dict):
+            parts.append(parameter_schema.get("description") or "")
+    return " ".join(parts)
+
+
+class AgentIndex:
+    """
+    TF-IDF index over the names and descriptions of agents, used to pick the agents relevant to a message.
+    Runs on CPU without any model, and is updated incrementally as agents are registered, changed and unregistered.
+    Catalogues being searched must not see it change, so updates for a new catalogue go to a copy.
+    """
+
+    def __init__(self):
+        self._terms: dict[str, Counter[str]] = {}  # agent name -> term counts
+        self._digests: dict[str, bytes] = {}  # agent name -> digest of the indexed text
+        self._document_frequency: Counter[str] = Counter()
+        self._norms: Optional[dict[str, float]] = None  # computed lazily, reset on every change
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def copy(self) -> "AgentIndex":
+        """
+        Returns an index with the same agents that can be updated independently of this one.
+        """
+        index = AgentIndex()
+        # Term counts of an agent are never modified, only replaced
+        index._terms = dict(self._terms)
+        index._digests = dict(self._digests)
+        index._document_frequency = self._document_frequency.copy()
+        index._norms = self._norms
+        return index
+
+    def add(self, agent: dict[str, Any], text: Optional[str] = None) -> None:
+        name = agent["name"]
+        if name in self._terms:
+            self.remove(name)
+        text = agent_text(agent) if text is None else text
+        terms = Counter(tokenize(text))
+        self._terms[name] = terms
+        self._digests[name] = self._digest(text)
+        self._document_frequency.update(terms.keys())
+        self._norms = None
+
+    def remove(self, name: str) -> None:
+        if (terms := self._terms.pop(name, None)) is None:
+            return
+        del self._digests[name]
+        self._document_frequency.subtract(terms.keys())
+        self._document_frequency += Counter()  # drop terms no agent has anymore
+        self._norms = None
+
+    def sync(self, agents: list[dict[str, Any]]) -> None:
+        """
+        Updates the index to contain exactly the given agents. Only added and removed agents, and agents whose
+        name, description or parameters have changed, are (re)indexed.
+        """
+        names = {agent["name"] for agent in agents}
+        for name in self._terms.keys() - names:
+            self.remove(name)
+        for agent in agents:
+            text = agent_text(agent)
+            if self._digests.get(agent["name"]) != self._digest(text):
+                self.add(agent, text=text)
+
+    def search(self, text: str, top_k: int) -> list[str]:
+        """
+        Returns names of the agents most similar to the text.
+
+        Args:
+            text (str): Text to match agents against, e.g. the user message
+            top_k (int): Maximum number of agents to return
+
+        Returns:
+            list[str]: Names of matching agents, best match first. Empty if no agent shares a word with the text.
+        """
+        query = {term: self._weight(term, count) for term, count in Counter(tokenize(text)).items()}
+        if not query:
+            return []
+
+        norms = self._get_norms()
+        scores = {}
+        for name, terms in self._terms.items():
+            score = sum(weight * self._weight(term, terms[term]) for term, weight in query.items() if term in terms)
+            if score > 0:
+                scores[name] = score / norms[name]
+        return sorted(scores, key=scores.get, reverse=True)[:top_k]
+
+    @staticmethod
+    def _digest(text: str) -> bytes:
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    def _weight(self, term: str, count: int) -> float:
+        idf = math.log((1 + len(self._terms)) / (1 + self._document_frequency[term])) + 1
+        return (1 + math.log(count)) * idf
+
+    def _get_norms(self) -> dict[str, float]:
+        if self._norms is None:
+            self._norms = {
+                name: math.sqrt(sum(self._weight(term, count) ** 2 for term, count in terms.items())) or 1.0
+                for name, terms in self._terms.items()
+            }
+        return self._norms
@@ -1,42 +1,172 @@
-from typing import Any
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
 
-import httpx
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage, AIMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.utils.function_calling import convert_to_openai_tool
 
 from llms.custom import ChatGenAI
+from utils.agent_index import AgentIndex
 from utils.common import bind_tools_safely, generate_hmac, combine_messages
 from config.settings import Settings
+from utils.http import get_http_client
+from utils.usage import llm_usage
 
-async def get_agents(url: str, agent_type: str, api_key: str, user_id: str):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            url,
-            headers={"X-API-KEY": api_key},
-            params={"agent_type": agent_type, "user_id": user_id},
+
+@dataclass(frozen=True)
+class AgentCatalogue:
+    """
+    Active agents of a user along with the tool list the supervisor binds to the LLM.
+    Tools are ordered by agent name, so that the tool list is byte-identical between requests
+    and forms a stable prompt prefix that provider-side prompt caching can hit.
+    """
+
+    agents: list[dict[str, Any]]
+    tools: list[dict[str, Any]]
+    tool_names: list[str] = field(default_factory=list)  # agent name of each tool
+    index: AgentIndex = field(default_factory=AgentIndex)
+
+    @classmethod
+    def from_agents(cls, agents: list[dict[str, Any]], index: Optional[AgentIndex] = None) -> "AgentCatalogue":
+        """
+        Args:
+            agents (list[dict[str, Any]]): Active agents
+            index (Optional[AgentIndex]): Index of a previous catalogue of the same user. A copy of it is
+                updated with the added, changed and removed agents instead of indexing all agents again,
+                the previous catalogue may still be in use by other requests
+        """
+        index = index.copy() if index is not None else AgentIndex()
+        index.sync(agents)
+        ordered = sorted(agents, key=lambda agent: agent["name"])
+        return cls(
+            agents=agents,
+            tools=agent_tools(agents),
+            tool_names=[agent["name"] for agent in ordered],
+            index=index
         )
 
-        response.raise_for_status()
-        agents = response.json()
+    def candidate_tools(self, text: str, top_k: int) -> list[dict[str, Any]]:
+        """
+        Returns tools of the agents most relevant to the text, so that large catalogues don't have
+        to be bound to the LLM in full. All tools are returned if there are no more than `top_k`
+        agents, or if no agent matches the text at all.
+
+        Args:
+            text (str): The user message
+            top_k (int): Maximum number of tools, 0 disables pre-selection
+        """
+        if top_k <= 0 or len(self.tools) <= top_k:
+            return self.tools
+
+        candidates = set(self.index.search(text, top_k))
+        if not candidates:
+            return self.tools
+        # Kept in catalogue order, the same candidates always form the same tool list
+        return [tool for name, tool in zip(self.tool_names, self.tools) if name in candidates]
+
+
+def agent_tools(agents: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [
+        convert_to_openai_tool(agent["agent_schema"])
+        for agent in sorted(agents, key=lambda agent: agent["name"])
+    ]
+
+
+class AgentCatalogueCache:
+    """
+    Active agents per user, tagged with the catalogue version of the backend they were fetched for.
+    The backend bumps the version whenever agents, flows, MCP tools or A2A cards change and sends it
+    along with every chat message, so agents are only fetched again once the version changes.
+    """
+
+    def __init__(self, max_users: int = 1000):
+        self.max_users = max_users
+        self._entries: OrderedDict[str, tuple[int, AgentCatalogue]] = OrderedDict()
+
+    def get(self, user_id: str, version: Optional[int]) -> Optional[AgentCatalogue]:
+        entry = self._entries.get(user_id)
+        if version is None or not entry or entry[0] != version:
+            return None
+        self._entries.move_to_end(user_id)
+        return entry[1]
+
+    def latest(self, user_id: str) -> Optional[AgentCatalogue]:
+        """
+        Returns the catalogue cached for the user regardless of its version.
+        """
+        entry = self._entries.get(user_id)
+        return entry[1] if entry else None
+
+    def put(self, user_id: str, version: Optional[int], catalogue: AgentCatalogue) -> None:
+        if version is None:
+            return
+        self._entries[user_id] = (version, catalogue)
+        self._entries.move_to_end(user_id)
+        if len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+
+agent_catalogue_cache = AgentCatalogueCache()
+
+
+async def get_agents(url: str, agent_type: str, api_key: str, user_id: str):
+    response = await get_http_client().get(
+        url,
+        headers={"X-API-KEY": api_key},
+        params={"agent_type": agent_type, "user_id": user_id},
+    )
+
+    response.raise_for_status()
+    agents = response.json()
 
     return agents["active_connections"]
 
 
+async def get_agent_catalogue(
+        url: str,
+        agent_type: str,
+        api_key: str,
+        user_id: str,
+        catalogue_version: Optional[int]
+) -> AgentCatalogue:
+    """
+    Returns active agents of the user from the cache if they were fetched for the given catalogue version.
+    Without a version, e.g. from a backend that doesn't send one, agents are always fetched.
+    """
+    if (catalogue := agent_catalogue_cache.get(user_id, catalogue_version)) is not None:
+        return catalogue
+
+    agents = await get_agents(url=url, agent_type=agent_type, api_key=api_key, user_id=user_id)
+    previous = agent_catalogue_cache.latest(user_id)
+    catalogue = AgentCatalogue.from_agents(agents, index=previous.index if previous else None)
+    agent_catalogue_cache.put(user_id, catalogue_version, catalogue)
+    return catalogue
+
+
 async def select_agent_and_resolve_parameters(
         model: BaseChatModel,
         messages: list[BaseMessage],
         agents: list[dict[str, Any]],
-        agent_choice: bool = False
+        agent_choice: bool = False,
+        parallel_tool_calls: bool = False
 ) -> AIMessage:
+    invoke_kwargs = {}
     if isinstance(model, ChatGenAI):
-        model_json = model.model_dump()
-        model_json["default_headers"] = {
+        # Passed per request, so that the pooled model and its HTTP connections are reused
+        invoke_kwargs["extra_headers"] = {
             "X-HMAC": generate_hmac(Settings().SECRET_KEY, combine_messages(messages))
         }
-        model = ChatOpenAI.model_validate(model_json)
 
-    model_with_agents = bind_tools_safely(model=model, tools=agents, tool_choice=agent_choice)
+    model_with_agents = bind_tools_safely(
+        model=model,
+        tools=agents,
+        parallel_tool_calls=parallel_tool_calls,
+        tool_choice=agent_choice
+    )
 
-    response = await model_with_agents.ainvoke(messages)
+    start = time.perf_counter()
+    response = await model_with_agents.ainvoke(messages, **invoke_kwargs)
+    llm_usage.record(response, latency=time.perf_counter() - start)
     return response
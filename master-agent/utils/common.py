@@ -14,10 +14,15 @@ def attach_files_to_message(message: str, files: list[dict[str, Any]]):
     return formatted_message
 
 
-def bind_tools_safely(model: BaseChatModel, tools: list[dict[str, Any]], **kwargs):
+def bind_tools_safely(
+        model: BaseChatModel,
+        tools: list[dict[str, Any]],
+        parallel_tool_calls: bool = False,
+        **kwargs
+):
     if isinstance(model, ChatOllama):
         return model.bind_tools(tools, **kwargs)
-    return model.bind_tools(tools, parallel_tool_calls=False, **kwargs)
+    return model.bind_tools(tools, parallel_tool_calls=parallel_tool_calls, **kwargs)
 
 
 def filter_and_order_by_ids(ids: list[Any], items: list[dict[str, Any]]) -> list[dict[str, Any]]:
@@ -35,3 +40,7 @@ def generate_hmac(secret_key: str, message: str) -> str:
 
 def combine_messages(messages: list[BaseMessage]) -> str:
     return "\n".join([msg.content for msg in messages])
+
+
+def message_text(message: BaseMessage | str) -> str:
+    return message if isinstance(message, str) else str(message.content)
@@ -0,0 +1,34 @@
+import importlib.util
+from typing import Optional
+
+import httpx
+
+from config.settings import Settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the HTTP client shared by the whole process, creating it on first use.
+    Connections are kept alive between requests, HTTP/2 is used when the h2 package is installed.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        settings = Settings()
+        _client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
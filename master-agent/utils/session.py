@@ -0,0 +1,17 @@
+import copy
+
+from genai_session.session import GenAISession
+
+
+def request_scoped_session(session: GenAISession, request_id: str, session_id: str) -> GenAISession:
+    """
+    Returns a shallow copy of the session carrying the IDs of a single request.
+
+    The shared session gets request_id and session_id overwritten by every request it receives,
+    and GenAISession.send reads them only after awaiting its connection, so concurrent runs
+    must not invoke agents through the shared session.
+    """
+    request_session = copy.copy(session)
+    request_session.request_id = request_id
+    request_session.session_id = session_id
+    return request_session
@@ -0,0 +1,113 @@
+import json
+from typing import Any
+
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph.state import CompiledStateGraph
+from loguru import logger
+from websockets.asyncio.client import ClientConnection
+
+from models.enums import Nodes
+from utils.common import remove_last_underscore_segment
+
+AGENT_STREAM = "agent_stream"
+
+
+class RunEventStream:
+    """
+    Sends progress of a master agent run to the backend over the router, which forwards it to the frontend.
+    """
+
+    def __init__(self, websocket: ClientConnection, session_id: str, request_id: str):
+        """
+        Args:
+            websocket (ClientConnection): Router connection of the master agent session
+            session_id (str): Chat session of the run
+            request_id (str): Request of the run, taken when the run starts as the session context
+                is shared by concurrent requests
+        """
+        self.websocket = websocket
+        self.session_id = session_id
+        self.request_id = request_id
+
+    async def send(self, event: str, data: dict[str, Any]) -> None:
+        try:
+            await self.websocket.send(
+                json.dumps({
+                    "message_type": AGENT_STREAM,
+                    "session_id": self.session_id,
+                    "request_id": self.request_id,
+                    "event": event,
+                    "data": data,
+                })
+            )
+        except Exception as e:
+            # Streaming is best effort, the final response is returned either way
+            logger.warning(f"Failed to stream {event} event: {e}")
+
+
+def as_list(messages: BaseMessage | list[BaseMessage] | None) -> list[BaseMessage]:
+    if messages is None:
+        return []
+    return messages if isinstance(messages, list) else [messages]
+
+
+async def stream_run(
+        graph: CompiledStateGraph,
+        input: dict[str, Any],
+        config: RunnableConfig,
+        events: RunEventStream
+) -> dict[str, Any]:
+    """
+    Runs the graph, streaming selected agents, agent responses and tokens of the final answer as they come.
+
+    Whether a supervisor turn is the final answer is only known once it calls tools or ends without doing so.
+    Tokens carry the ID of their supervisor message, and tokens of a message that turns out to call tools are
+    withdrawn with a `token_discard` event, so that only the final answer remains.
+
+    Returns:
+        dict[str, Any]: The final state, as returned by `ainvoke`
+    """
+    final_state = {}
+    streamed_messages, tool_call_messages = set(), set()
+    async for mode, chunk in graph.astream(input=input, config=config, stream_mode=["updates", "messages", "values"]):
+        if mode == "values":
+            final_state = chunk
+
+        elif mode == "messages":
+            message, metadata = chunk
+            if not (
+                    isinstance(message, AIMessageChunk)
+                    and metadata.get("langgraph_node") == Nodes.supervisor.value
+            ):
+                continue
+
+            if message.tool_call_chunks:
+                if message.id not in tool_call_messages:
+                    tool_call_messages.add(message.id)
+                    if message.id in streamed_messages:
+                        await events.send("token_discard", {"message_id": message.id})
+            elif message.content and message.id not in tool_call_messages:
+                streamed_messages.add(message.id)
+                await events.send("token", {"content": message.content, "message_id": message.id})
+
+        elif mode == "updates":
+            for node, update in chunk.items():
+                for message in as_list((update or {}).get("messages")):
+                    if node == Nodes.supervisor.value and getattr(message, "tool_calls", None):
+                        await events.send(
+                            "agent_selected",
+                            {
+                                "agents": [
+                                    {"name": remove_last_underscore_segment(call["name"]), "args": call["args"]}
+                                    for call in message.tool_calls
+                                ]
+                            }
+                        )
+                    elif node == Nodes.execute_agent.value:
+                        await events.send(
+                            "agent_response",
+                            {"name": remove_last_underscore_segment(message.name or ""), "response": message.content}
+                        )
+
+    return final_state
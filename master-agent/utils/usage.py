@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from langchain_core.messages import AIMessage
+from loguru import logger
+
+
+@dataclass
+class LLMUsage:
+    """
+    Token and latency totals of the LLM calls of the process, used to follow the prompt cache hit rate.
+    Cached input tokens are reported by providers with prompt caching (e.g. OpenAI) for prompts
+    sharing a prefix of at least 1024 tokens with a recent request.
+    """
+
+    calls: int = 0
+    input_tokens: int = 0
+    cached_input_tokens: int = 0
+    output_tokens: int = 0
+    latency: float = 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cached_input_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def record(self, response: AIMessage, latency: float) -> None:
+        """
+        Adds the usage of a single LLM call to the totals.
+
+        Args:
+            response (AIMessage): Response of the LLM
+            latency (float): Seconds the call took
+        """
+        usage = response.usage_metadata or {}
+        input_tokens = usage.get("input_tokens", 0)
+        cached_input_tokens = usage.get("input_token_details", {}).get("cache_read") or 0
+        output_tokens = usage.get("output_tokens", 0)
+
+        self.calls += 1
+        self.input_tokens += input_tokens
+        self.cached_input_tokens += cached_input_tokens
+        self.output_tokens += output_tokens
+        self.latency += latency
+
+        logger.info(
+            f"LLM call took {latency:.3f}s, {input_tokens} input tokens ({cached_input_tokens} cached), "
+            f"{output_tokens} output tokens. Totals: {self.calls} calls, {self.input_tokens} input tokens, "
+            f"cache hit rate {self.cache_hit_rate:.1%}, {self.latency / self.calls:.3f}s per call"
+        )
+
+
+llm_usage = LLMUsage()
@@ -0,0 +1,83 @@
+"""
+Compares routing an AGENT_RESPONSE through the regular JSON path with the envelope fast path.
+
+Run from the router directory:
+    python -m benchmarks.envelope_forwarding
+"""
+
+import asyncio
+import json
+import time
+
+from connectors.connection import ClientConnection
+from connectors.pool import ReplicaPool
+from connectors.registry import ConnectionRegistry
+from connectors.ws_connector_manager import WSConnectionManager
+from utils.codecs import ENVELOPE_CODEC, JSON_CODEC, Codec
+from utils.enums import WSMessageType
+
+PAYLOAD_SIZES = (1_000, 100_000, 1_000_000, 5_000_000)
+ITERATIONS = 50
+
+
+class NullWebSocket:
+    """
+    Stand-in for a WebSocket that drops everything sent to it.
+    """
+
+    async def send_text(self, data: str) -> None:
+        pass
+
+    async def send_bytes(self, data: bytes) -> None:
+        pass
+
+
+def build_manager(codec: Codec) -> WSConnectionManager:
+    manager = WSConnectionManager(registry=ConnectionRegistry())
+    for client_id in ("agent", "invoker"):
+        connection = ClientConnection(
+            client_id=client_id, websocket=NullWebSocket(), codec=codec
+        )
+        connection.start()
+        manager.active_connections[client_id] = ReplicaPool(client_id)
+        manager.active_connections[client_id].add(connection)
+    return manager
+
+
+def build_response(size: int) -> dict:
+    return {
+        "message_type": WSMessageType.AGENT_RESPONSE.value,
+        "invoked_by": "invoker",
+        "execution_time": 0.1,
+        "response": {"output": "x" * size, "items": list(range(size // 1000))},
+    }
+
+
+async def measure(manager: WSConnectionManager, frame: str | bytes) -> float:
+    agent = manager.active_connections["agent"].newest
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await manager.process_message(agent, frame, agent_jwt=None)
+    elapsed = (time.perf_counter() - start) / ITERATIONS
+
+    await manager.stop()
+    return elapsed
+
+
+async def main():
+    print(f"{'payload':>10} | {'json (ms)':>10} | {'envelope (ms)':>13} | speedup")
+    for size in PAYLOAD_SIZES:
+        response = build_response(size)
+
+        json_time = await measure(build_manager(JSON_CODEC), json.dumps(response))
+        envelope_time = await measure(
+            build_manager(ENVELOPE_CODEC), ENVELOPE_CODEC.encode(response)
+        )
+        print(
+            f"{size:>10} | {json_time * 1000:>10.3f} | {envelope_time * 1000:>13.3f} "
+            f"| {json_time / envelope_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
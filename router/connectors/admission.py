@@ -0,0 +1,177 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from settings import get_settings
+from utils.enums import ErrorType
+
+app_settings = get_settings()
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate` tokens per second up to `burst` tokens.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def retry_after(self) -> float:
+        """
+        Returns the seconds until a token is available, 0 if one is available now.
+        """
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> float:
+        """
+        Takes a token if one is available.
+
+        Returns:
+            float: 0 if a token has been taken, otherwise the seconds until one is available.
+        """
+        self.refill(now)
+        if retry_after := self.retry_after():
+            return retry_after
+        self.tokens -= 1
+        return 0.0
+
+    @property
+    def is_full(self) -> bool:
+        return self.tokens >= self.burst
+
+
+class TokenBuckets:
+    """
+    Token buckets of one kind, created lazily per key. Idle buckets are dropped once
+    there are more than `max_buckets` of them, a full bucket behaves like a new one.
+    """
+
+    def __init__(self, rate: float, burst: float, max_buckets: int = 10_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def get(self, key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if not bucket:
+            if len(self._buckets) >= self.max_buckets:
+                self._prune(now)
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+        bucket.refill(now)
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        for key, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.is_full:
+                del self._buckets[key]
+
+
+@dataclass
+class Rejection:
+    """
+    Reason an invocation hasn't been admitted and when the caller may retry it.
+    """
+
+    error_message: str
+    error_type: ErrorType
+    retry_after: float
+
+
+class AdmissionController:
+    """
+    Decides whether an AGENT_INVOKE may be forwarded to its agent.
+
+    Invocations have to pass a token bucket per invoking client, per target agent and
+    per user owning the target agent, and the agent must have fewer than
+    `max_concurrency` invocations pending. Tokens are only taken from the buckets once
+    all checks have passed, so a rejected invocation doesn't count against any limit.
+    Rate 0 disables a bucket kind, max_concurrency 0 disables the concurrency cap.
+    """
+
+    def __init__(
+        self,
+        client_rate: float = app_settings.ROUTER_RATE_LIMIT_CLIENT_RATE,
+        client_burst: float = app_settings.ROUTER_RATE_LIMIT_CLIENT_BURST,
+        agent_rate: float = app_settings.ROUTER_RATE_LIMIT_AGENT_RATE,
+        agent_burst: float = app_settings.ROUTER_RATE_LIMIT_AGENT_BURST,
+        user_rate: float = app_settings.ROUTER_RATE_LIMIT_USER_RATE,
+        user_burst: float = app_settings.ROUTER_RATE_LIMIT_USER_BURST,
+        max_concurrency: int = app_settings.ROUTER_AGENT_MAX_CONCURRENCY,
+        busy_retry_after: float = app_settings.ROUTER_AGENT_BUSY_RETRY_AFTER,
+    ):
+        self.clients = TokenBuckets(client_rate, client_burst)
+        self.agents = TokenBuckets(agent_rate, agent_burst)
+        self.users = TokenBuckets(user_rate, user_burst)
+        self.max_concurrency = max_concurrency
+        self.busy_retry_after = busy_retry_after
+
+    @staticmethod
+    def caller_of(client_id: str) -> str:
+        """
+        Returns the caller part of the ID of an invoking connection, which has the form
+        `<caller_id>:<target>#<connection id>`. Every invocation opens a new connection, so the
+        caller is what identifies the client.
+        """
+        return client_id.rsplit(":", 1)[0]
+
+    def admit(
+        self,
+        caller: Optional[str],
+        agent_uuid: str,
+        user_id: Optional[str],
+        pending: int,
+    ) -> Optional[Rejection]:
+        """
+        Admits an invocation and takes a token from every bucket it is subject to.
+
+        Args:
+            caller (Optional[str]): The invoking client, None if it isn't rate limited.
+            agent_uuid (str): ID of the invoked agent.
+            user_id (Optional[str]): Owner of the invoked agent, if known.
+            pending (int): Invocations currently pending on the agent.
+
+        Returns:
+            Optional[Rejection]: None if the invocation is admitted.
+        """
+        if self.max_concurrency and pending >= self.max_concurrency:
+            return Rejection(
+                error_message=f"Agent has reached its limit of {self.max_concurrency} concurrent invocations",
+                error_type=ErrorType.AGENT_OVERLOADED,
+                retry_after=self.busy_retry_after,
+            )
+
+        now = time.monotonic()
+        buckets = [
+            (kind, limiter.get(key, now))
+            for kind, limiter, key in (
+                ("client", self.clients, caller),
+                ("agent", self.agents, agent_uuid),
+                ("user", self.users, user_id),
+            )
+            if limiter.enabled and key
+        ]
+
+        for kind, bucket in buckets:
+            if retry_after := bucket.retry_after():
+                return Rejection(
+                    error_message=f"Invocation rate limit per {kind} exceeded",
+                    error_type=ErrorType.RATE_LIMIT_EXCEEDED,
+                    retry_after=retry_after,
+                )
+
+        for _, bucket in buckets:
+            bucket.tokens -= 1
+        return None
@@ -0,0 +1,88 @@
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import jwt
+
+from settings import get_settings
+
+app_settings = get_settings()
+
+
+@dataclass(frozen=True)
+class AgentIdentity:
+    """
+    Identity of an agent taken from its verified JWT.
+    """
+
+    agent_uuid: str
+    user_id: Optional[str] = None
+
+
+class AgentTokenVerifier:
+    """
+    Verifies agent JWTs and keeps the identities of valid tokens in a bounded LRU cache.
+
+    A cached identity is reused until the cache TTL or the expiry of the token passes,
+    whichever comes first, so reconnecting agents cost a dictionary lookup instead of
+    an HMAC check. Invalid tokens are never cached.
+    """
+
+    def __init__(
+        self,
+        secret_key: str = app_settings.ROUTER_JWT_SECRET_KEY,
+        algorithm: str = app_settings.ROUTER_JWT_ALGORITHM,
+        cache_size: int = app_settings.ROUTER_JWT_CACHE_SIZE,
+        cache_ttl: float = app_settings.ROUTER_JWT_CACHE_TTL,
+    ):
+        """
+        Args:
+            secret_key (str): Key the backend signs agent JWTs with.
+            algorithm (str): Signing algorithm of agent JWTs.
+            cache_size (int): Maximum number of cached tokens.
+            cache_ttl (float): Seconds a verified token is trusted without checking it again.
+        """
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache: OrderedDict[str, tuple[AgentIdentity, float]] = OrderedDict()
+
+    def verify(self, token: str) -> Optional[AgentIdentity]:
+        """
+        Returns the identity of a valid agent JWT.
+
+        Args:
+            token (str): The agent JWT.
+
+        Returns:
+            Optional[AgentIdentity]: The identity, None if the token is invalid or expired.
+        """
+        now = time.time()
+        if cached := self._cache.get(token):
+            identity, valid_until = cached
+            if valid_until > now:
+                self._cache.move_to_end(token)
+                return identity
+            del self._cache[token]
+
+        try:
+            payload = jwt.decode(token, key=self.secret_key, algorithms=[self.algorithm])
+        except jwt.InvalidTokenError as e:
+            logging.warning(f"Rejected agent JWT: {e}")
+            return None
+
+        if not (agent_uuid := payload.get("sub")):
+            logging.warning("Rejected agent JWT without subject")
+            return None
+
+        identity = AgentIdentity(agent_uuid=agent_uuid, user_id=payload.get("user_id"))
+        self._cache[token] = (
+            identity,
+            min(now + self.cache_ttl, payload.get("exp", float("inf"))),
+        )
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return identity
@@ -0,0 +1,96 @@
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+from connectors.outbound import Frame, OutboundQueue
+from utils.codecs import JSON_CODEC, Codec
+
+if TYPE_CHECKING:
+    from connectors.invocations import Invocation
+
+
+@dataclass(eq=False)
+class ClientConnection:
+    """
+    WebSocket connection of a single client together with its negotiated wire codec
+    and its outbound send queue.
+
+    Several connections may share a client ID (replicas of the same agent), connection_id
+    tells them apart. in_flight holds the invocations waiting for this replica, it is kept
+    up to date by the invocation table.
+    user_id is the owner of an agent, taken from the agent JWT.
+    """
+
+    client_id: str
+    websocket: WebSocket
+    codec: Codec = field(default=JSON_CODEC)
+    user_id: Optional[str] = None
+    connection_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    in_flight: Set["Invocation"] = field(default_factory=set)
+    outbound: OutboundQueue = field(init=False)
+
+    def __post_init__(self):
+        self.outbound = OutboundQueue(name=self.client_id, send=self._write_frame)
+
+    def start(self) -> None:
+        """
+        Starts the writer task draining the outbound queue.
+        """
+        self.outbound.start()
+
+    async def close(self) -> None:
+        """
+        Stops the writer task, frames still in the queue are discarded.
+        """
+        await self.outbound.close()
+
+    async def receive(self) -> str | bytes:
+        """
+        Receives the next frame from the client.
+
+        Returns:
+            str | bytes: Text frames are returned as str, binary frames as bytes.
+
+        Raises:
+            WebSocketDisconnect: If the client has disconnected.
+        """
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+
+        if message.get("bytes") is not None:
+            return message["bytes"]
+        return message["text"]
+
+    async def send(self, message: dict[str, Any] | str) -> bool:
+        """
+        Encodes a message with the negotiated codec and enqueues it for sending.
+
+        Args:
+            message (dict[str, Any] | str): The message, a str is treated as already encoded JSON.
+
+        Returns:
+            bool: False if the message has been dropped by the queue policy.
+        """
+        if isinstance(message, str):
+            if not self.codec.binary:
+                return await self.outbound.put(message)
+            message = JSON_CODEC.decode(message)
+
+        return await self.outbound.put(self.codec.encode(message))
+
+    async def send_frame(self, frame: bytes) -> bool:
+        """
+        Enqueues a binary frame that is already encoded with the codec of the connection.
+
+        Returns:
+            bool: False if the frame has been dropped by the queue policy.
+        """
+        return await self.outbound.put(frame)
+
+    async def _write_frame(self, frame: Frame) -> None:
+        if isinstance(frame, bytes):
+            await self.websocket.send_bytes(frame)
+        else:
+            await self.websocket.send_text(frame)
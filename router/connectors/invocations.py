@@ -0,0 +1,204 @@
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Optional, Set
+
+if TYPE_CHECKING:
+    from connectors.connection import ClientConnection
+
+
+@dataclass(eq=False)
+class Invocation:
+    """
+    AGENT_INVOKE forwarded to an agent and still waiting for its response.
+
+    Agents echo the ID of the invoking connection back as `invoked_by`, which makes it
+    the correlation key together with the agent. A connection may have several
+    invocations in flight, they are completed oldest first. The protocol's request_id is
+    shared by every call made while serving one user request, so it's only kept for logging.
+
+    replica is the agent connection serving the invocation if it's held by this worker.
+    Invocations are local on the worker of the invoking connection, which reports their
+    outcome. When the replica is held by another worker, that worker keeps a remote entry
+    only to account for the replica's in-flight invocations.
+    """
+
+    invoked_by: str
+    agent_uuid: str
+    deadline: float
+    request_id: Optional[str] = None
+    started_at: float = field(default_factory=time.monotonic)
+    replica: Optional["ClientConnection"] = None
+    local: bool = True
+
+
+class InvocationTable:
+    """
+    In-flight invocations indexed by invoking connection, by target agent and by deadline.
+    Removing an invocation in any way also removes it from the in-flight set of its replica.
+    """
+
+    def __init__(self):
+        self._invocations: Dict[str, list[Invocation]] = {}
+        self._by_agent: Dict[str, Set[Invocation]] = {}
+        self._deadlines: list[tuple[float, int, Invocation]] = []
+        # Tie-breaker for equal deadlines, invocations themselves aren't comparable
+        self._sequence = itertools.count()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(
+        self,
+        invoked_by: str,
+        agent_uuid: str,
+        timeout: float,
+        request_id: Optional[str] = None,
+        replica: Optional["ClientConnection"] = None,
+        local: bool = True,
+    ) -> Invocation:
+        """
+        Records an invocation forwarded to an agent.
+
+        Args:
+            invoked_by (str): ID of the invoking connection.
+            agent_uuid (str): ID of the invoked agent.
+            timeout (float): Seconds the agent has to respond, 0 disables the deadline.
+            request_id (Optional[str]): Request ID from the request metadata.
+            replica (Optional[ClientConnection]): Agent connection serving the invocation.
+            local (bool): False if the invoking connection is held by another worker.
+
+        Returns:
+            Invocation: The recorded invocation.
+        """
+        deadline = time.monotonic() + timeout if timeout > 0 else float("inf")
+        invocation = Invocation(
+            invoked_by=invoked_by,
+            agent_uuid=agent_uuid,
+            deadline=deadline,
+            request_id=request_id,
+            local=local,
+        )
+        self._invocations.setdefault(invoked_by, []).append(invocation)
+        if local:
+            # Pending invocations are only counted on the worker of the invoking connection
+            self._by_agent.setdefault(agent_uuid, set()).add(invocation)
+        if replica:
+            self.assign(invocation, replica)
+        self._count += 1
+        if timeout > 0:
+            heapq.heappush(
+                self._deadlines, (deadline, next(self._sequence), invocation)
+            )
+            if len(self._deadlines) > 2 * self._count + 1024:
+                self._compact()
+        return invocation
+
+    def find_unassigned(self, invoked_by: str, agent_uuid: str) -> Optional[Invocation]:
+        """
+        Returns the oldest invocation of the given agent made by the given connection that
+        hasn't been handed to a replica yet.
+        """
+        for invocation in self._invocations.get(invoked_by, ()):
+            if invocation.agent_uuid == agent_uuid and not invocation.replica:
+                return invocation
+        return None
+
+    @staticmethod
+    def assign(invocation: Invocation, replica: "ClientConnection") -> None:
+        """
+        Records the replica serving an invocation.
+        """
+        invocation.replica = replica
+        replica.in_flight.add(invocation)
+
+    def complete(self, invoked_by: str, agent_uuid: str) -> Optional[Invocation]:
+        """
+        Removes the oldest invocation of the given agent made by the given connection.
+
+        Returns:
+            Optional[Invocation]: The removed invocation, None if there was none.
+        """
+        for invocation in self._invocations.get(invoked_by, ()):
+            if invocation.agent_uuid == agent_uuid:
+                self.remove(invocation)
+                return invocation
+        return None
+
+    def complete_all(self, invoked_by: str) -> list[Invocation]:
+        """
+        Removes and returns all invocations made by the given connection.
+        """
+        invocations = list(self._invocations.get(invoked_by, ()))
+        for invocation in invocations:
+            self.remove(invocation)
+        return invocations
+
+    def remove(self, invocation: Invocation) -> None:
+        """
+        Removes an invocation, nothing happens if it has been removed already.
+        """
+        invocations = self._invocations.get(invocation.invoked_by)
+        if not invocations or invocation not in invocations:
+            return
+
+        invocations.remove(invocation)
+        if not invocations:
+            del self._invocations[invocation.invoked_by]
+        if invocation.local:
+            pending = self._by_agent[invocation.agent_uuid]
+            pending.discard(invocation)
+            if not pending:
+                del self._by_agent[invocation.agent_uuid]
+        if invocation.replica:
+            invocation.replica.in_flight.discard(invocation)
+        self._count -= 1
+
+    def pending_count(self, agent_uuid: str) -> int:
+        """
+        Returns the number of invocations the agent hasn't responded to yet.
+        """
+        return len(self._by_agent.get(agent_uuid, ()))
+
+    def pending_by_agent(self) -> Dict[str, int]:
+        """
+        Returns the number of pending invocations of every agent that has any.
+        """
+        return {agent_uuid: len(pending) for agent_uuid, pending in self._by_agent.items()}
+
+    def pop_by_agent(self, agent_uuid: str) -> list[Invocation]:
+        """
+        Removes and returns all invocations pending on the given agent.
+        """
+        invocations = list(self._by_agent.get(agent_uuid, ()))
+        for invocation in invocations:
+            self.remove(invocation)
+        return invocations
+
+    def _compact(self) -> None:
+        """
+        Drops deadline entries of invocations that have completed in the meantime.
+        """
+        self._deadlines = [
+            (invocation.deadline, next(self._sequence), invocation)
+            for invocations in self._invocations.values()
+            for invocation in invocations
+            if invocation.deadline != float("inf")
+        ]
+        heapq.heapify(self._deadlines)
+
+    def pop_expired(self, now: Optional[float] = None) -> list[Invocation]:
+        """
+        Removes and returns all invocations whose deadline has passed.
+        """
+        now = now or time.monotonic()
+        expired = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, _, invocation = heapq.heappop(self._deadlines)
+            # Entries of completed invocations are skipped lazily
+            if invocation in self._invocations.get(invocation.invoked_by, ()):
+                self.remove(invocation)
+                expired.append(invocation)
+        return expired
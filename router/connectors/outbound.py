@@ -0,0 +1,138 @@
+import asyncio
+import contextlib
+import logging
+from collections import deque
+from typing import Awaitable, Callable
+
+from settings import get_settings
+from utils.enums import SendQueuePolicy
+from utils.metrics import BYTES_SENT, FRAMES_DROPPED, FRAMES_SENT, frame_size
+
+app_settings = get_settings()
+
+Frame = str | bytes
+
+
+class OutboundQueue:
+    """
+    Bounded queue of outgoing frames of a single connection, drained by its own writer task.
+
+    Senders only enqueue, so a slow receiver can't stall the receive loop of whoever is
+    sending to it. Once the queue reaches the high watermark, the policy decides what happens:
+    - drop: new frames are dropped until the writer drains the queue to the low watermark
+    - park: senders wait until the queue is drained to the low watermark, frames are
+      dropped only if that takes longer than the park timeout. A parked sender doesn't
+      read its own socket meanwhile, so this trades head-of-line blocking for fewer drops
+    """
+
+    def __init__(
+        self,
+        name: str,
+        send: Callable[[Frame], Awaitable[None]],
+        high_watermark: int = app_settings.ROUTER_SEND_QUEUE_HIGH_WATERMARK,
+        low_watermark: int = app_settings.ROUTER_SEND_QUEUE_LOW_WATERMARK,
+        policy: SendQueuePolicy = app_settings.ROUTER_SEND_QUEUE_POLICY,
+        park_timeout: float = app_settings.ROUTER_SEND_QUEUE_PARK_TIMEOUT,
+    ):
+        """
+        Args:
+            name (str): Name used in logs, usually the client ID.
+            send (Callable[[Frame], Awaitable[None]]): Coroutine writing a frame to the socket.
+            high_watermark (int): Depth at which the policy kicks in.
+            low_watermark (int): Depth at which the queue accepts frames again.
+            policy (SendQueuePolicy): What to do with frames above the high watermark.
+            park_timeout (float): How long a parked sender waits before its frame is dropped.
+        """
+        self.name = name
+        self.high_watermark = high_watermark
+        self.low_watermark = min(low_watermark, high_watermark)
+        self.policy = policy
+        self.park_timeout = park_timeout
+
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+        self._send = send
+        self._frames: deque[Frame] = deque()
+        self._has_frames = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._writer: asyncio.Task | None = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._frames)
+
+    def start(self) -> None:
+        """
+        Starts the writer task.
+        """
+        self._writer = asyncio.create_task(self._write())
+
+    async def close(self) -> None:
+        """
+        Stops the writer task and discards frames that haven't been sent.
+        """
+        if self._writer:
+            self._writer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._writer
+        self._frames.clear()
+        self._drained.set()
+
+    async def put(self, frame: Frame) -> bool:
+        """
+        Enqueues a frame according to the queue policy.
+
+        Args:
+            frame (Frame): The encoded frame.
+
+        Returns:
+            bool: True if the frame has been enqueued, False if it has been dropped.
+        """
+        if self._writer and self._writer.done():
+            # The socket is gone, nothing will drain the queue anymore
+            return self._drop()
+
+        if self.depth >= self.high_watermark and self._drained.is_set():
+            self._drained.clear()
+            logging.warning(
+                f"Send queue of {self.name} reached {self.depth} frames, applying '{self.policy.value}' policy"
+            )
+
+        if not self._drained.is_set():
+            if self.policy == SendQueuePolicy.DROP:
+                return self._drop()
+            try:
+                await asyncio.wait_for(self._drained.wait(), timeout=self.park_timeout)
+            except asyncio.TimeoutError:
+                return self._drop()
+
+        self._frames.append(frame)
+        self.max_depth = max(self.max_depth, self.depth)
+        self._has_frames.set()
+        return True
+
+    def _drop(self) -> bool:
+        self.dropped += 1
+        FRAMES_DROPPED.inc()
+        return False
+
+    async def _write(self) -> None:
+        while True:
+            await self._has_frames.wait()
+            while self._frames:
+                frame = self._frames.popleft()
+                if self.depth <= self.low_watermark:
+                    self._drained.set()
+                try:
+                    await self._send(frame)
+                except Exception as e:
+                    logging.warning(f"Stopped sending to {self.name}: {e}")
+                    self._drained.set()
+                    return
+                self.sent += 1
+                FRAMES_SENT.inc()
+                BYTES_SENT.inc(frame_size(frame))
+            self._has_frames.clear()
@@ -0,0 +1,57 @@
+from typing import Iterator
+
+from connectors.connection import ClientConnection
+from utils.enums import ReplicaBalancing
+
+
+class ReplicaPool:
+    """
+    All connections of one client ID held by this worker.
+
+    Several processes started with the same agent JWT form a pool of replicas of that
+    agent. Invocations are spread across the replicas, everything else goes to the
+    most recently connected one.
+    """
+
+    def __init__(self, client_id: str):
+        self.client_id = client_id
+        self.replicas: list[ClientConnection] = []
+        self._next_replica = 0
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def __iter__(self) -> Iterator[ClientConnection]:
+        return iter(self.replicas)
+
+    def __contains__(self, connection: ClientConnection) -> bool:
+        return connection in self.replicas
+
+    @property
+    def newest(self) -> ClientConnection:
+        return self.replicas[-1]
+
+    def add(self, connection: ClientConnection) -> None:
+        self.replicas.append(connection)
+
+    def remove(self, connection: ClientConnection) -> None:
+        self.replicas.remove(connection)
+
+    def pick(self, balancing: ReplicaBalancing) -> ClientConnection:
+        """
+        Picks the replica that should serve the next invocation.
+
+        Args:
+            balancing (ReplicaBalancing): Round-robin or least outstanding invocations.
+
+        Returns:
+            ClientConnection: The selected replica.
+        """
+        if len(self.replicas) == 1:
+            return self.replicas[0]
+
+        if balancing == ReplicaBalancing.ROUND_ROBIN:
+            self._next_replica = (self._next_replica + 1) % len(self.replicas)
+            return self.replicas[self._next_replica]
+
+        return min(self.replicas, key=lambda replica: len(replica.in_flight))
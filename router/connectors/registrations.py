@@ -0,0 +1,82 @@
+import asyncio
+import contextlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from settings import get_settings
+
+app_settings = get_settings()
+
+Registration = Dict[str, Any]
+
+
+class RegistrationBatcher:
+    """
+    Collects agent registrations for the backend and sends them in bulk.
+
+    After a router restart every agent reconnects and registers within seconds, and the
+    backend re-validates all flows for each registration. Registrations arriving within
+    the batch window are sent together, so the backend validates flows once per batch.
+    A repeated registration of the same agent replaces the pending one.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list[Registration]], Awaitable[None]],
+        window: float = app_settings.ROUTER_REGISTER_BATCH_WINDOW,
+        max_size: int = app_settings.ROUTER_REGISTER_BATCH_SIZE,
+    ):
+        """
+        Args:
+            send (Callable[[list[Registration]], Awaitable[None]]): Coroutine sending a
+                batch of registrations to the backend.
+            window (float): Seconds registrations are collected for, 0 disables batching.
+            max_size (int): Number of registrations that triggers sending before the window ends.
+        """
+        self.window = window
+        self.max_size = max_size
+        self._send = send
+        self._pending: Dict[str, Registration] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def add(self, agent_uuid: str, registration: Registration) -> None:
+        """
+        Queues a registration, or sends it right away if batching is disabled.
+        """
+        if self.window <= 0:
+            await self._send([registration])
+            return
+
+        self._pending[agent_uuid] = registration
+        if len(self._pending) >= self.max_size:
+            await self.flush()
+        elif not self._flusher:
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    def discard(self, agent_uuid: str) -> None:
+        """
+        Drops the pending registration of an agent that has disconnected in the meantime.
+        """
+        self._pending.pop(agent_uuid, None)
+
+    async def flush(self) -> None:
+        """
+        Sends all pending registrations.
+        """
+        if self._flusher and self._flusher is not asyncio.current_task():
+            self._flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flusher
+        self._flusher = None
+
+        registrations = list(self._pending.values())
+        self._pending.clear()
+        if registrations:
+            await self._send(registrations)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        try:
+            await self.flush()
+        except Exception as e:
+            logging.exception(f"Failed to send agent registrations: {e}")
@@ -0,0 +1,244 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from settings import get_settings
+
+app_settings = get_settings()
+
+DeliverCallback = Callable[[str, str, Optional[str], Optional[str]], Awaitable[None]]
+DisconnectCallback = Callable[[str], Awaitable[None]]
+
+
+class ConnectionRegistry:
+    """
+    In-process registry of client_id -> worker ownership.
+
+    Used when the router runs as a single worker: every connection lives in the
+    local process, so lookups never resolve to a remote worker and nothing has to
+    be forwarded.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._on_deliver: Optional[DeliverCallback] = None
+        self._on_disconnect: Optional[DisconnectCallback] = None
+
+    async def start(
+        self, on_deliver: DeliverCallback, on_disconnect: DisconnectCallback
+    ) -> None:
+        """
+        Starts the registry.
+
+        Args:
+            on_deliver (DeliverCallback): Called with (client_id, message, invoked_by, answered_by)
+                when another worker forwards a message to a connection held by this worker.
+            on_disconnect (DisconnectCallback): Called with client_id when a connection
+                held by another worker goes away.
+        """
+        self._on_deliver = on_deliver
+        self._on_disconnect = on_disconnect
+
+    async def stop(self) -> None:
+        """
+        Stops the registry and releases all ownership records of this worker.
+        """
+
+    async def register(self, client_id: str) -> None:
+        """
+        Records that this worker holds connections of the given client.
+        """
+
+    async def unregister(self, client_id: str) -> bool:
+        """
+        Removes the ownership record of this worker for the given client.
+        If no other worker holds the client anymore, other workers are notified.
+
+        Returns:
+            bool: True if the client is not connected to any worker anymore.
+        """
+        return True
+
+    async def lookup(self, client_id: str) -> Optional[str]:
+        """
+        Resolves the worker holding the connection of the given client.
+
+        Returns:
+            Optional[str]: The worker ID or None if the client is not connected anywhere.
+        """
+        return None
+
+    async def forward(
+        self,
+        worker_id: str,
+        client_id: str,
+        message: str,
+        invoked_by: Optional[str] = None,
+        answered_by: Optional[str] = None,
+    ) -> None:
+        """
+        Forwards an already serialized message to a client held by another worker.
+        invoked_by marks invocations, so the receiving worker can balance them across replicas.
+        answered_by marks outcomes of invocations, so the receiving worker can complete them.
+        """
+
+
+class RedisConnectionRegistry(ConnectionRegistry):
+    """
+    Redis-backed registry shared by all router workers.
+
+    Ownership is kept in one set of worker IDs per client, as replicas of the same
+    agent may be connected to different workers. Every worker subscribes to its own
+    channel for forwarded messages and to a broadcast channel for disconnect
+    notifications. Workers keep a heartbeat key alive so that records left behind by
+    a crashed worker are ignored.
+    """
+
+    CONNECTIONS_PREFIX = "router:connections:"
+    EVENTS_CHANNEL = "router:events"
+    WORKER_CHANNEL_PREFIX = "router:worker:"
+    WORKER_ALIVE_PREFIX = "router:alive:"
+
+    def __init__(self, redis_url: str):
+        super().__init__()
+        # Imported lazily so single-worker deployments don't need the dependency
+        from redis import asyncio as aioredis
+
+        self._redis = aioredis.from_url(redis_url, decode_responses=True)
+        self._pubsub = self._redis.pubsub()
+        self._local_ids: set[str] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def _channel(self) -> str:
+        return f"{self.WORKER_CHANNEL_PREFIX}{self.worker_id}"
+
+    async def start(
+        self, on_deliver: DeliverCallback, on_disconnect: DisconnectCallback
+    ) -> None:
+        await super().start(on_deliver, on_disconnect)
+        await self._heartbeat_once()
+        await self._pubsub.subscribe(self._channel, self.EVENTS_CHANNEL)
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._heartbeat()),
+        ]
+        logging.info(f"Router worker {self.worker_id} joined shared registry")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+        for client_id in list(self._local_ids):
+            await self.unregister(client_id)
+
+        await self._redis.delete(f"{self.WORKER_ALIVE_PREFIX}{self.worker_id}")
+        await self._pubsub.aclose()
+        await self._redis.aclose()
+
+    async def register(self, client_id: str) -> None:
+        self._local_ids.add(client_id)
+        await self._redis.sadd(f"{self.CONNECTIONS_PREFIX}{client_id}", self.worker_id)
+
+    async def unregister(self, client_id: str) -> bool:
+        self._local_ids.discard(client_id)
+
+        key = f"{self.CONNECTIONS_PREFIX}{client_id}"
+        await self._redis.srem(key, self.worker_id)
+        if await self.lookup(client_id):
+            return False
+
+        await self._redis.publish(
+            self.EVENTS_CHANNEL,
+            json.dumps({"worker_id": self.worker_id, "disconnected": client_id}),
+        )
+        return True
+
+    async def lookup(self, client_id: str) -> Optional[str]:
+        key = f"{self.CONNECTIONS_PREFIX}{client_id}"
+        # A random owner spreads load when replicas are connected to several workers
+        while worker_id := await self._redis.srandmember(key):
+            if await self._redis.exists(f"{self.WORKER_ALIVE_PREFIX}{worker_id}"):
+                return worker_id
+
+            # Stale record of a worker that died without cleaning up
+            await self._redis.srem(key, worker_id)
+        return None
+
+    async def forward(
+        self,
+        worker_id: str,
+        client_id: str,
+        message: str,
+        invoked_by: Optional[str] = None,
+        answered_by: Optional[str] = None,
+    ) -> None:
+        await self._redis.publish(
+            f"{self.WORKER_CHANNEL_PREFIX}{worker_id}",
+            json.dumps(
+                {
+                    "client_id": client_id,
+                    "message": message,
+                    "invoked_by": invoked_by,
+                    "answered_by": answered_by,
+                }
+            ),
+        )
+
+    async def _listen(self) -> None:
+        async for event in self._pubsub.listen():
+            if event.get("type") != "message":
+                continue
+
+            try:
+                data = json.loads(event["data"])
+                if event["channel"] == self.EVENTS_CHANNEL:
+                    if data.get("worker_id") != self.worker_id:
+                        await self._on_disconnect(data["disconnected"])
+                else:
+                    await self._on_deliver(
+                        data["client_id"],
+                        data["message"],
+                        data.get("invoked_by"),
+                        data.get("answered_by"),
+                    )
+            except Exception as e:
+                logging.exception(f"Failed to process registry event: {e}")
+
+    async def _heartbeat_once(self) -> None:
+        await self._redis.set(
+            f"{self.WORKER_ALIVE_PREFIX}{self.worker_id}",
+            "1",
+            ex=app_settings.ROUTER_WORKER_HEARTBEAT_TTL,
+        )
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(app_settings.ROUTER_WORKER_HEARTBEAT_TTL / 3)
+            try:
+                await self._heartbeat_once()
+            except Exception as e:
+                logging.exception(f"Failed to refresh router worker heartbeat: {e}")
+
+
+def create_registry() -> ConnectionRegistry:
+    """
+    Creates the connection registry according to the router settings.
+
+    Returns:
+        ConnectionRegistry: Redis-backed registry if ROUTER_REDIS_URL is set, in-process one otherwise.
+    """
+    if app_settings.ROUTER_REDIS_URL:
+        return RedisConnectionRegistry(app_settings.ROUTER_REDIS_URL)
+
+    if app_settings.ROUTER_WORKERS > 1:
+        raise RuntimeError(
+            "Running the router with several workers requires ROUTER_REDIS_URL to be set"
+        )
+    return ConnectionRegistry()
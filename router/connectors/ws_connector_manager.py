@@ -1,16 +1,68 @@
+import asyncio
+import contextlib
 import json
 import logging
-import jwt
+import random
+import time
+import uuid
 
-from typing import Dict
+from typing import Any, Dict, Optional
 
 from fastapi import WebSocket
+from connectors.admission import AdmissionController, TokenBucket
+from connectors.auth import AgentTokenVerifier
+from connectors.connection import ClientConnection
+from connectors.invocations import InvocationTable
+from connectors.pool import ReplicaPool
+from connectors.registrations import Registration, RegistrationBatcher
+from connectors.registry import ConnectionRegistry, create_registry
 from settings import get_settings
+from utils.codecs import Codec, CodecError, ENVELOPE_CODEC, JSON_CODEC, get_codec
 from utils.enums import WSMessageType, MasterServerName, ErrorType
+from utils.metrics import frame_size, observe_message
 
 app_settings = get_settings()
 
 
+def log_payload(description: str, payload: Any) -> None:
+    """
+    Logs a payload at DEBUG level for a sample of messages. Payloads can be megabytes,
+    so they aren't even formatted unless they are going to be logged.
+    """
+    if (
+        logging.getLogger().isEnabledFor(logging.DEBUG)
+        and random.random() < app_settings.ROUTER_PAYLOAD_LOG_SAMPLE_RATE
+    ):
+        logging.debug("%s: %s", description, payload)
+
+
+def reconnect_hint(delay: float = 0.0) -> str:
+    """
+    Returns a close reason telling the client when to reconnect. Random jitter is added
+    so that clients disconnected at the same time don't reconnect at the same time.
+    """
+    delay += random.uniform(0, app_settings.ROUTER_RECONNECT_JITTER)
+    return f"reconnect_after={delay:.1f}"
+
+
+def invocation_timeout(request_metadata: dict) -> float:
+    """
+    Returns the deadline of an invocation in seconds, taken from request_metadata.timeout.
+    Missing, non-numeric and negative timeouts fall back to the configured default.
+    """
+    timeout = request_metadata.get("timeout")
+    if not timeout:
+        return app_settings.ROUTER_INVOCATION_TIMEOUT
+    try:
+        timeout = float(timeout)
+    except (TypeError, ValueError):
+        timeout = -1.0
+    if not 0 <= timeout < float("inf"):
+        logging.warning(f"Ignoring invalid invocation timeout: {request_metadata['timeout']!r}")
+        return app_settings.ROUTER_INVOCATION_TIMEOUT
+    return timeout
+
+
 class WSConnectionManager:
     """
     WebSocket Connection Manager responsible for managing active WebSocket connections,
@@ -23,31 +75,130 @@ class WSConnectionManager:
         app_settings.MASTER_AGENT_API_KEY: MasterServerName.MASTER_SERVER_ML.value,
     }
 
-    def __init__(self):
+    def __init__(self, registry: ConnectionRegistry | None = None):
         """
         Initializes the WebSocket connection manager with an empty active connections dictionary.
+
+        Args:
+            registry (ConnectionRegistry | None): Registry shared between router workers.
+                Defaults to the one configured in settings.
+        """
+        self.active_connections: Dict[str, ReplicaPool] = {}
+        self.registry = registry or create_registry()
+        self.invocations = InvocationTable()
+        self.admission = AdmissionController()
+        self.token_verifier = AgentTokenVerifier()
+        self.connect_limiter = TokenBucket(
+            rate=app_settings.ROUTER_CONNECT_RATE, burst=app_settings.ROUTER_CONNECT_BURST
+        )
+        self.registrations = RegistrationBatcher(send=self._send_registrations)
+        self._invocation_sweeper: asyncio.Task | None = None
+
+    async def start(self):
+        """
+        Joins the connection registry so messages can be exchanged with other router workers
+        and starts expiring invocations that ran past their deadline.
         """
-        self.active_connections: Dict[str, WebSocket] = {}
+        await self.registry.start(
+            on_deliver=self._deliver_local,
+            on_disconnect=self._fail_pending_invocations,
+        )
+        self._invocation_sweeper = asyncio.create_task(self._expire_invocations())
+
+    async def stop(self):
+        """
+        Sends pending agent registrations, closes all connections with a jittered
+        reconnect hint and leaves the connection registry.
+        """
+        if self._invocation_sweeper:
+            self._invocation_sweeper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._invocation_sweeper
+
+        with contextlib.suppress(Exception):
+            await self.registrations.flush()
+
+        for pool in list(self.active_connections.values()):
+            for connection in pool:
+                await connection.close()
+                # The server may have closed the socket already
+                with contextlib.suppress(Exception):
+                    await connection.websocket.close(code=1012, reason=reconnect_hint())
+        await self.registry.stop()
+
+    def send_queue_stats(self) -> list[Dict[str, Any]]:
+        """
+        Returns outbound queue metrics of every connection held by this worker.
+        """
+        return [
+            {
+                "client_id": connection.client_id,
+                "connection_id": connection.connection_id,
+                "in_flight": len(connection.in_flight),
+                "depth": connection.outbound.depth,
+                "max_depth": connection.outbound.max_depth,
+                "sent": connection.outbound.sent,
+                "dropped": connection.outbound.dropped,
+            }
+            for pool in self.active_connections.values()
+            for connection in pool
+        ]
+
+    async def is_connected(self, client_id: str) -> bool:
+        """
+        Checks whether the client is connected to this or any other router worker.
+        """
+        if client_id in self.active_connections:
+            return True
+        return await self.registry.lookup(client_id) is not None
 
     async def process_message(
-        self, client_id: str, message: str, agent_jwt: str
+        self, connection: ClientConnection, message: str | bytes, agent_jwt: str
     ) -> None:
         """
         Processes incoming messages from clients and routes them based on message type.
 
         Args:
-            client_id (str): The ID of the client sending the message.
-            message (str): The message content as a JSON string.
+            connection (ClientConnection): The connection the message has been received on.
+            message (str | bytes): The frame as received, a JSON string or a binary frame
+                encoded with the codec negotiated by the client.
+        """
+        started_at = time.perf_counter()
+        codec = connection.codec if isinstance(message, bytes) else JSON_CODEC
+        if codec is ENVELOPE_CODEC and (
+            message_type := await self._forward_envelope(connection, message)
+        ):
+            path = "envelope"
+        else:
+            message_type = await self._route_message(connection, codec, message, agent_jwt)
+            path = "decoded"
+        observe_message(
+            message_type, frame_size(message), time.perf_counter() - started_at, path
+        )
+
+    async def _route_message(
+        self,
+        connection: ClientConnection,
+        codec: Codec,
+        message: str | bytes,
+        agent_jwt: str,
+    ) -> Optional[str]:
+        """
+        Decodes a message and routes it based on its message type.
+
+        Returns:
+            Optional[str]: The message type, None if the message couldn't be decoded.
         """
+        client_id = connection.client_id
         try:
-            data = json.loads(message)
-            logging.debug(f"Received message: {data}")
-        except json.JSONDecodeError:
+            data = codec.decode(message)
+            log_payload("Received message", data)
+        except CodecError:
             await self.send_message(
                 client_id=client_id,
                 message={
                     "error": {
-                        "error_message": "Invalid JSON format",
+                        "error_message": f"Invalid {codec.label} format",
                         "error_type": ErrorType.INVALID_JSON_REQUEST_FORMAT.value,
                     }
                 },
@@ -59,19 +210,16 @@ class WSConnectionManager:
 
             if message_type == WSMessageType.AGENT_REGISTER.value:
                 if client_id not in self.MASTER_SERVERS_API_KEY_MAPPING.values():
-                    request_payload = {
-                        "request_payload": {
+                    # Register the agent in SQL Database
+                    await self.registrations.add(
+                        client_id,
+                        {
                             **payload,
                             "agent_uuid": client_id,
                             "agent_jwt": agent_jwt,
-                            "message_type": message_type,
-                        }
-                    }
-
-                    # Register the agent in SQL Database
-                    await self.send_message(
-                        client_id=MasterServerName.MASTER_SERVER_BE.value,
-                        message=request_payload,
+                            # Owner from the JWT verified on connect, spares the backend decoding it again
+                            "agent_user_id": connection.user_id,
+                        },
                     )
 
             elif message_type in (
@@ -81,9 +229,16 @@ class WSConnectionManager:
                 invoked_by = data.pop("invoked_by", None)
                 data["message_type"] = message_type
                 logging.info(
-                    f"Got response: {data}, from: {client_id}, invoked_by: {invoked_by}"
+                    f"Got {message_type} from: {client_id}, invoked_by: {invoked_by}"
+                )
+                log_payload("Response payload", data)
+                invocation = self.invocations.complete(invoked_by, client_id)
+                # Invocations made through another worker are completed by that worker
+                await self.send_message(
+                    invoked_by,
+                    data,
+                    answered_by=None if invocation and invocation.local else client_id,
                 )
-                await self.send_message(invoked_by, data)
 
             elif message_type == WSMessageType.AGENT_INVOKE.value:
                 if not payload and not agent_uuid:
@@ -97,7 +252,8 @@ class WSConnectionManager:
                         },
                     )
 
-                if agent_uuid not in self.active_connections:
+                is_agent_active = await self.is_connected(agent_uuid)
+                if not is_agent_active:
                     await self.send_message(
                         client_id=client_id,
                         message={
@@ -132,9 +288,25 @@ class WSConnectionManager:
                         await self.send_message(agent_uuid, payload)
                     else:
                         data["invoked_by"] = client_id
-                        await self.send_message(agent_uuid, data)
+                        if is_agent_active:
+                            if not await self._admit(client_id, agent_uuid):
+                                return message_type
+                            request_metadata = data.get("request_metadata") or {}
+                            self.invocations.add(
+                                invoked_by=client_id,
+                                agent_uuid=agent_uuid,
+                                timeout=invocation_timeout(request_metadata),
+                                request_id=request_metadata.get("request_id"),
+                            )
+                        await self.send_message(
+                            agent_uuid, data, invoked_by=client_id
+                        )
 
-            elif message_type == WSMessageType.AGENT_LOG.value:
+            elif message_type == WSMessageType.AGENT_LOG.value or (
+                # Progress of a master agent run, only the master agent may stream to users
+                message_type == WSMessageType.AGENT_STREAM.value
+                and client_id == MasterServerName.MASTER_SERVER_ML.value
+            ):
                 await self.send_message(
                     client_id=MasterServerName.MASTER_SERVER_BE.value,
                     message={
@@ -157,61 +329,322 @@ class WSConnectionManager:
                     },
                 )
 
-    async def send_message(self, client_id: str, message: str | dict):
+            return message_type
+
+    async def _forward_envelope(
+        self, sender: ClientConnection, frame: bytes
+    ) -> Optional[str]:
+        """
+        Fast path for envelope frames. Routes AGENT_RESPONSE/AGENT_ERROR and AGENT_INVOKE
+        by reading the header only and splices the payload through untouched.
+
+        Args:
+            sender (ClientConnection): The connection the frame has been received on.
+            frame (bytes): The envelope frame as received.
+
+        Returns:
+            Optional[str]: The message type if the frame has been routed, None if it has to
+                be decoded.
+        """
+        try:
+            header, payload_offset = ENVELOPE_CODEC.read_header(frame)
+        except CodecError:
+            return None
+
+        client_id = sender.client_id
+        message_type = header.get("message_type")
+        request_metadata = header.get("request_metadata") or {}
+        if message_type in (
+            WSMessageType.AGENT_RESPONSE.value,
+            WSMessageType.AGENT_ERROR.value,
+        ):
+            target = header.get("invoked_by")
+            outgoing_header = {"message_type": message_type}
+        elif message_type == WSMessageType.AGENT_INVOKE.value and not client_id.startswith(
+            app_settings.MASTER_BE_API_KEY
+        ):
+            # Invocations from Master BE may carry errors in the payload, they need the regular path
+            target = header.get("agent_uuid")
+            outgoing_header = {"invoked_by": client_id}
+            if request_metadata:
+                outgoing_header["request_metadata"] = request_metadata
+        else:
+            return None
+
+        pool = self.active_connections.get(target) if target else None
+        if target == MasterServerName.MASTER_SERVER_ML.value or not pool:
+            # The receiver is on another worker
+            return None
+
+        is_invoke = message_type == WSMessageType.AGENT_INVOKE.value
+        connection = (
+            pool.pick(app_settings.ROUTER_REPLICA_BALANCING) if is_invoke else pool.newest
+        )
+        if connection.codec is not ENVELOPE_CODEC:
+            # The receiver needs the payload re-encoded
+            return None
+
+        if is_invoke and not await self._admit(client_id, target):
+            return message_type
+
+        logging.info(f"Forwarding {message_type} from: {client_id}, to: {target}")
+        if is_invoke:
+            self.invocations.add(
+                invoked_by=client_id,
+                agent_uuid=target,
+                timeout=invocation_timeout(request_metadata),
+                request_id=request_metadata.get("request_id"),
+                replica=connection,
+            )
+        else:
+            self.invocations.complete(target, client_id)
+
+        await connection.send_frame(
+            ENVELOPE_CODEC.splice(outgoing_header, frame, payload_offset)
+        )
+        return message_type
+
+    async def _send_registrations(self, registrations: list[Registration]) -> None:
+        """
+        Sends agent registrations to Master BE, several of them as one bulk message.
+        """
+        if len(registrations) == 1:
+            request_payload = {
+                **registrations[0],
+                "message_type": WSMessageType.AGENT_REGISTER.value,
+            }
+        else:
+            logging.info(f"Sending {len(registrations)} agent registrations in bulk")
+            request_payload = {
+                "message_type": WSMessageType.AGENT_REGISTER_BATCH.value,
+                "agents": registrations,
+            }
+
+        await self.send_message(
+            client_id=MasterServerName.MASTER_SERVER_BE.value,
+            message={"request_payload": request_payload},
+        )
+
+    async def _admit(self, client_id: str, agent_uuid: str) -> bool:
+        """
+        Runs an invocation through admission control. Rejected invocations are answered
+        with an AGENT_ERROR telling the caller when to retry.
+
+        Args:
+            client_id (str): ID of the invoking connection.
+            agent_uuid (str): ID of the invoked agent.
+
+        Returns:
+            bool: True if the invocation may be forwarded.
+        """
+        caller = self.admission.caller_of(client_id)
+        if (
+            caller in self.MASTER_SERVERS_API_KEY_MAPPING
+            or caller in self.MASTER_SERVERS_API_KEY_MAPPING.values()
+        ):
+            # Master servers invoke on behalf of every user, they are only limited per agent and user
+            caller = None
+
+        pool = self.active_connections.get(agent_uuid)
+        rejection = self.admission.admit(
+            caller=caller,
+            agent_uuid=agent_uuid,
+            user_id=pool.newest.user_id if pool else None,
+            pending=self.invocations.pending_count(agent_uuid),
+        )
+        if not rejection:
+            return True
+
+        logging.warning(
+            f"Rejected invocation of {agent_uuid}: {rejection.error_message}"
+        )
+        await self.send_message(
+            client_id=client_id,
+            message={
+                "message_type": WSMessageType.AGENT_ERROR.value,
+                "error": {
+                    "error_message": rejection.error_message,
+                    "error_type": rejection.error_type.value,
+                    "agent_uuid": agent_uuid,
+                    "retry_after": round(rejection.retry_after, 3),
+                },
+            },
+        )
+        return False
+
+    async def send_message(
+        self,
+        client_id: str,
+        message: str | dict,
+        invoked_by: Optional[str] = None,
+        answered_by: Optional[str] = None,
+    ):
         """
         Sends a message to the specified client if the connection exists.
+        The message is encoded with the codec negotiated by the receiving client.
 
         Args:
             client_id (str): The client ID to which the message should be sent.
-            message (str | dict): The message content, can be a string or a dictionary.
+            message (str | dict): The message content, can be a JSON string or a dictionary.
+            invoked_by (Optional[str]): ID of the invoking connection if the message is an
+                invocation, it is then balanced across the replicas of the client.
+            answered_by (Optional[str]): ID of the agent if the message is the outcome of an
+                invocation that still has to be completed by the worker of the client.
         """
-        message = json.dumps(message) if isinstance(message, dict) else message
-        logging.info(f"Sending message: {message}, to: {client_id}")
-        if websocket := self.active_connections.get(client_id):
-            await websocket.send_text(message)
+        log_payload(f"Sending message to {client_id}", message)
+        if client_id in self.active_connections:
+            await self._deliver_local(client_id, message, invoked_by, answered_by)
+        elif worker_id := await self.registry.lookup(client_id):
+            message = json.dumps(message) if isinstance(message, dict) else message
+            await self.registry.forward(
+                worker_id, client_id, message, invoked_by, answered_by
+            )
 
-    async def connect(self, websocket: WebSocket) -> str:
+    async def _deliver_local(
+        self,
+        client_id: str,
+        message: str | dict,
+        invoked_by: Optional[str] = None,
+        answered_by: Optional[str] = None,
+    ):
+        """
+        Sends a message to a client connected to this worker.
+        Invocations go to the replica picked by the balancing strategy, anything else
+        to the newest replica. Outcomes of invocations answered by an agent connected to
+        another worker complete the invocation here.
+        """
+        if answered_by:
+            self.invocations.complete(client_id, answered_by)
+        if not (pool := self.active_connections.get(client_id)):
+            return
+
+        if invoked_by:
+            connection = pool.pick(app_settings.ROUTER_REPLICA_BALANCING)
+            if invocation := self.invocations.find_unassigned(invoked_by, client_id):
+                self.invocations.assign(invocation, connection)
+            else:
+                # Invoked through another worker, tracked here only for the replica's sake
+                self.invocations.add(
+                    invoked_by=invoked_by,
+                    agent_uuid=client_id,
+                    timeout=app_settings.ROUTER_INVOCATION_TIMEOUT,
+                    replica=connection,
+                    local=False,
+                )
+        else:
+            connection = pool.newest
+        await connection.send(message)
+
+    async def connect(
+        self, websocket: WebSocket
+    ) -> tuple[Optional[ClientConnection], Optional[str]]:
         """
         Accepts a new WebSocket connection and assigns a client ID based on headers.
+        The wire codec is negotiated via the `x-genai-codec` header, the chosen one is
+        echoed back in the handshake response. Clients that don't ask for one get JSON.
+        Connections sharing a client ID are kept side by side as replicas.
+
+        Invoking connections get an ID of their own, the invoke key followed by the
+        connection ID, so concurrent invocations with the same invoke key never share
+        a connection pool and each gets its own response.
+
+        Agent connections are rate limited to smooth out reconnect storms, rejected ones
+        are closed with code 1013 and a jittered reconnect hint. Connections without a
+        valid authorization header are closed with code 4000.
 
         Args:
             websocket (WebSocket): The WebSocket connection instance.
 
         Returns:
-            str: The resolved client ID.
+            tuple[Optional[ClientConnection], Optional[str]]: The connection, None if it
+                has been rejected, and the agent JWT.
         """
         client_id = None
         agent_jwt = None
+        user_id = None
+        retry_after = 0.0
+        connection_id = uuid.uuid4().hex
 
         if api_key := websocket.headers.get("api-key"):
             client_id = self.MASTER_SERVERS_API_KEY_MAPPING.get(api_key)
 
         elif agent_jwt := websocket.headers.get("x-custom-authorization"):
-            try:
-                decoded = jwt.decode(
-                    agent_jwt, options={"verify_signature": False}, algorithms=["HS256"]
-                )
-                client_id = decoded.get("sub")
-            except jwt.DecodeError:
-                client_id = agent_jwt
+            # Limited before the JWT is checked, so a storm doesn't cost an HMAC check per attempt
+            retry_after = self.connect_limiter.take(time.monotonic())
+            if not retry_after and (identity := self.token_verifier.verify(agent_jwt)):
+                client_id = identity.agent_uuid
+                user_id = identity.user_id
         elif invoke_key := websocket.headers.get("x-custom-invoke-key"):
-            client_id = invoke_key
+            client_id = f"{invoke_key}#{connection_id}"
+
+        codec = get_codec(websocket.headers.get("x-genai-codec"))
+        await websocket.accept(headers=[(b"x-genai-codec", codec.name.encode())])
+        if retry_after:
+            await websocket.close(code=1013, reason=reconnect_hint(retry_after))
+            return None, agent_jwt
+        if not client_id:
+            await websocket.close(code=4000, reason="Missing or invalid Authorization header")
+            return None, agent_jwt
 
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-        return client_id, agent_jwt
+        connection = ClientConnection(
+            client_id=client_id,
+            websocket=websocket,
+            codec=codec,
+            user_id=user_id,
+            connection_id=connection_id,
+        )
+        connection.start()
 
-    async def disconnect(self, client_id: str):
+        pool = self.active_connections.get(client_id)
+        if not pool:
+            pool = self.active_connections[client_id] = ReplicaPool(client_id)
+            await self.registry.register(client_id)
+        pool.add(connection)
+        if len(pool) > 1:
+            logging.info(f"Replica {len(pool)} of {client_id} connected")
+        return connection, agent_jwt
+
+    async def disconnect(self, connection: ClientConnection):
         """
-        Disconnects a client and notifies relevant parties about the unregistration.
+        Disconnects a client connection. Once the last replica of the client is gone,
+        relevant parties are notified about the unregistration.
 
         Args:
-            client_id (str): The ID of the client to disconnect.
+            connection (ClientConnection): The connection to disconnect.
         """
-        if client_id not in self.active_connections:
+        client_id = connection.client_id
+        pool = self.active_connections.get(client_id)
+        if not pool or connection not in pool:
+            return
+
+        pool.remove(connection)
+        await connection.close()
+
+        # Invocations routed to this replica won't be answered anymore
+        for invocation in list(connection.in_flight):
+            self.invocations.remove(invocation)
+            await self.send_message(
+                client_id=invocation.invoked_by,
+                message={
+                    "message_type": WSMessageType.AGENT_ERROR.value,
+                    "error": {
+                        "error_message": "Agent replica has disconnected",
+                        "agent_uuid": client_id,
+                    },
+                },
+                answered_by=None if invocation.local else client_id,
+            )
+
+        if pool:
             return
 
         del self.active_connections[client_id]
+        self.registrations.discard(client_id)
+        # Invocations made by this connection won't be answered anymore
+        self.invocations.complete_all(client_id)
+        if not await self.registry.unregister(client_id):
+            # Replicas of the client are still connected to other workers
+            return
 
         if not client_id.startswith(
             app_settings.MASTER_BE_API_KEY
@@ -226,17 +659,51 @@ class WSConnectionManager:
                 },
             )
 
-        for connection_id in (
-            self.active_connections
-        ):  # Clean up all connections created via session.send
-            if client_id in connection_id:
-                await self.send_message(
-                    client_id=connection_id,
-                    message={
-                        "message_type": WSMessageType.AGENT_ERROR.value,
-                        "error": {
-                            "error_message": "Agent has been unregistered",
-                            "agent_uuid": client_id,
-                        },
+        await self._fail_pending_invocations(client_id)
+
+    async def _fail_pending_invocations(self, client_id: str):
+        """
+        Notifies callers of invocations pending on an agent that the agent is gone.
+
+        Args:
+            client_id (str): The ID of the disconnected agent.
+        """
+        for invocation in self.invocations.pop_by_agent(client_id):
+            await self.send_message(
+                client_id=invocation.invoked_by,
+                message={
+                    "message_type": WSMessageType.AGENT_ERROR.value,
+                    "error": {
+                        "error_message": "Agent has been unregistered",
+                        "agent_uuid": client_id,
                     },
+                },
+            )
+
+    async def _expire_invocations(self):
+        """
+        Periodically fails invocations whose agents didn't respond before the deadline.
+        """
+        while True:
+            await asyncio.sleep(app_settings.ROUTER_INVOCATION_SWEEP_INTERVAL)
+            for invocation in self.invocations.pop_expired():
+                if not invocation.local:
+                    # The worker of the invoking connection reports the timeout
+                    continue
+                logging.warning(
+                    f"Invocation of {invocation.agent_uuid} by {invocation.invoked_by} timed out"
                 )
+                try:
+                    await self.send_message(
+                        client_id=invocation.invoked_by,
+                        message={
+                            "message_type": WSMessageType.AGENT_ERROR.value,
+                            "error": {
+                                "error_message": "Agent did not respond in time",
+                                "error_type": ErrorType.AGENT_INVOCATION_TIMEOUT.value,
+                                "agent_uuid": invocation.agent_uuid,
+                            },
+                        },
+                    )
+                except Exception as e:
+                    logging.exception(f"Failed to notify {invocation.invoked_by}: {e}")
@@ -1,20 +1,43 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Response, WebSocket, WebSocketDisconnect
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
 
 from connectors.ws_connector_manager import WSConnectionManager
+from settings import get_settings
+from utils.metrics import RouterCollector
 from utils.pydantic_models import Message, MessageResponse
 
+app_settings = get_settings()
+
+# Manages WebSocket connections and routes messages
+ws_connection_manager = WSConnectionManager()
+REGISTRY.register(RouterCollector(ws_connection_manager))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Joins the shared connection registry on startup and leaves it on shutdown.
+
+    Args:
+        app (FastAPI): The FastAPI application instance.
+    """
+    await ws_connection_manager.start()
+    yield
+    await ws_connection_manager.stop()
+
+
 app = FastAPI(
     title="Agent WebSocket API",
     description="Server manages WebSocket agents' connections and message processing.",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
-# Manages WebSocket connections and routes messages
-ws_connection_manager = WSConnectionManager()
-
 
 @app.websocket(path="/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -27,22 +50,20 @@ async def websocket_endpoint(websocket: WebSocket):
     Args:
         websocket (WebSocket): The incoming WebSocket connection.
     """
-    client_id, agent_jwt = await ws_connection_manager.connect(websocket)
+    connection, agent_jwt = await ws_connection_manager.connect(websocket)
 
-    if not client_id:
-        # Reject connection if no valid authorization header
-        await websocket.close(code=4000, reason="Missing Authorization header")
-    else:
+    # Rejected connections have already been closed with the reason
+    if connection:
         try:
             # Continuously listen for messages
             while True:
-                data = await websocket.receive_text()
+                data = await connection.receive()
                 await ws_connection_manager.process_message(
-                    client_id, data, agent_jwt=agent_jwt
+                    connection, data, agent_jwt=agent_jwt
                 )
         except WebSocketDisconnect:
             # Handle client disconnection
-            await ws_connection_manager.disconnect(client_id)
+            await ws_connection_manager.disconnect(connection)
 
 
 @app.post(
@@ -55,6 +76,16 @@ async def invoke_agent(message: Message) -> MessageResponse:
     return MessageResponse(detail=f"Message sent to client {message.client_id}")
 
 
+@app.get(path="/metrics", summary="Prometheus metrics of this router worker")
+async def metrics() -> Response:
+    return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
-    # Run the FastAPI app using Uvicorn on port 8080 with auto-reload
-    uvicorn.run("main:app", port=8080, reload=True)
+    # Run the FastAPI app using Uvicorn on port 8080, auto-reload is only available with a single worker
+    uvicorn.run(
+        "main:app",
+        port=8080,
+        reload=app_settings.ROUTER_WORKERS == 1,
+        workers=app_settings.ROUTER_WORKERS,
+    )
@@ -1,7 +1,9 @@
 from functools import lru_cache
+from typing import Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from utils.enums import ReplicaBalancing, SendQueuePolicy
 
 
 class Settings(BaseSettings):
@@ -20,6 +22,92 @@ class Settings(BaseSettings):
         alias="MASTER_BE_API_KEY",
     )
 
+    # Agent JWTs are signed by the backend, the router verifies them on connect
+    ROUTER_JWT_SECRET_KEY: str = Field(
+        default="c41302ce0f1758f4ae5dcc65729fd50a", alias="SECRET_KEY"
+    )
+    ROUTER_JWT_ALGORITHM: str = Field(default="HS256", alias="HASH_ALGORITHM")
+    ROUTER_JWT_CACHE_SIZE: int = Field(default=10_000, alias="ROUTER_JWT_CACHE_SIZE")
+    ROUTER_JWT_CACHE_TTL: float = Field(default=300.0, alias="ROUTER_JWT_CACHE_TTL")
+
+    # Multi-worker mode: uvicorn reads WEB_CONCURRENCY as the default number of workers
+    ROUTER_WORKERS: int = Field(default=1, alias="WEB_CONCURRENCY")
+    ROUTER_REDIS_URL: Optional[str] = Field(default=None, alias="ROUTER_REDIS_URL")
+    ROUTER_WORKER_HEARTBEAT_TTL: int = Field(
+        default=15, alias="ROUTER_WORKER_HEARTBEAT_TTL"
+    )
+
+    # Outbound send queue of every connection
+    ROUTER_SEND_QUEUE_HIGH_WATERMARK: int = Field(
+        default=1000, alias="ROUTER_SEND_QUEUE_HIGH_WATERMARK"
+    )
+    ROUTER_SEND_QUEUE_LOW_WATERMARK: int = Field(
+        default=500, alias="ROUTER_SEND_QUEUE_LOW_WATERMARK"
+    )
+    ROUTER_SEND_QUEUE_POLICY: SendQueuePolicy = Field(
+        default=SendQueuePolicy.DROP, alias="ROUTER_SEND_QUEUE_POLICY"
+    )
+    ROUTER_SEND_QUEUE_PARK_TIMEOUT: float = Field(
+        default=30.0, alias="ROUTER_SEND_QUEUE_PARK_TIMEOUT"
+    )
+
+    # Deadline of agent invocations, can be overridden per call with request_metadata.timeout
+    ROUTER_INVOCATION_TIMEOUT: float = Field(
+        default=600.0, alias="ROUTER_INVOCATION_TIMEOUT"
+    )
+    ROUTER_INVOCATION_SWEEP_INTERVAL: float = Field(
+        default=1.0, alias="ROUTER_INVOCATION_SWEEP_INTERVAL"
+    )
+
+    # How invocations are spread across replicas of the same agent
+    ROUTER_REPLICA_BALANCING: ReplicaBalancing = Field(
+        default=ReplicaBalancing.LEAST_OUTSTANDING, alias="ROUTER_REPLICA_BALANCING"
+    )
+
+    # Admission control of agent invocations, rate 0 disables a limit
+    ROUTER_RATE_LIMIT_CLIENT_RATE: float = Field(
+        default=20.0, alias="ROUTER_RATE_LIMIT_CLIENT_RATE"
+    )
+    ROUTER_RATE_LIMIT_CLIENT_BURST: float = Field(
+        default=40.0, alias="ROUTER_RATE_LIMIT_CLIENT_BURST"
+    )
+    ROUTER_RATE_LIMIT_AGENT_RATE: float = Field(
+        default=100.0, alias="ROUTER_RATE_LIMIT_AGENT_RATE"
+    )
+    ROUTER_RATE_LIMIT_AGENT_BURST: float = Field(
+        default=200.0, alias="ROUTER_RATE_LIMIT_AGENT_BURST"
+    )
+    ROUTER_RATE_LIMIT_USER_RATE: float = Field(
+        default=50.0, alias="ROUTER_RATE_LIMIT_USER_RATE"
+    )
+    ROUTER_RATE_LIMIT_USER_BURST: float = Field(
+        default=100.0, alias="ROUTER_RATE_LIMIT_USER_BURST"
+    )
+    ROUTER_AGENT_MAX_CONCURRENCY: int = Field(
+        default=256, alias="ROUTER_AGENT_MAX_CONCURRENCY"
+    )
+    ROUTER_AGENT_BUSY_RETRY_AFTER: float = Field(
+        default=1.0, alias="ROUTER_AGENT_BUSY_RETRY_AFTER"
+    )
+
+    # Reconnect storm protection: agent connects per second, bulk agent registrations
+    ROUTER_CONNECT_RATE: float = Field(default=100.0, alias="ROUTER_CONNECT_RATE")
+    ROUTER_CONNECT_BURST: float = Field(default=200.0, alias="ROUTER_CONNECT_BURST")
+    ROUTER_RECONNECT_JITTER: float = Field(
+        default=5.0, alias="ROUTER_RECONNECT_JITTER"
+    )
+    ROUTER_REGISTER_BATCH_WINDOW: float = Field(
+        default=0.5, alias="ROUTER_REGISTER_BATCH_WINDOW"
+    )
+    ROUTER_REGISTER_BATCH_SIZE: int = Field(
+        default=500, alias="ROUTER_REGISTER_BATCH_SIZE"
+    )
+
+    # Fraction of message payloads logged when DEBUG logging is enabled
+    ROUTER_PAYLOAD_LOG_SAMPLE_RATE: float = Field(
+        default=1.0, alias="ROUTER_PAYLOAD_LOG_SAMPLE_RATE"
+    )
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -0,0 +1,76 @@
+import time
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from settings import get_settings
+from utils.codecs import ENVELOPE_CODEC
+
+AGENT_UUID = "envelope-agent"
+app_settings = get_settings()
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def connect_agent(client: TestClient):
+    token = jwt.encode(
+        {"sub": AGENT_UUID},
+        app_settings.ROUTER_JWT_SECRET_KEY,
+        algorithm=app_settings.ROUTER_JWT_ALGORITHM,
+    )
+    return client.websocket_connect(
+        "/ws",
+        headers={"x-custom-authorization": token, "x-genai-codec": "envelope"},
+    )
+
+
+def connect_invoker(client: TestClient):
+    return client.websocket_connect(
+        "/ws",
+        headers={
+            "x-custom-invoke-key": f"caller:{AGENT_UUID}",
+            "x-genai-codec": "envelope",
+        },
+    )
+
+
+@pytest.mark.parametrize(
+    "request_metadata, expected_timeout",
+    [
+        ({"request_id": "r-1", "timeout": 5}, 5),
+        ({"request_id": "r-1"}, app_settings.ROUTER_INVOCATION_TIMEOUT),
+        ({"request_id": "r-1", "timeout": "soon"}, app_settings.ROUTER_INVOCATION_TIMEOUT),
+    ],
+)
+def test_envelope_invocation_honors_request_timeout(
+    client, request_metadata, expected_timeout
+):
+    manager = main.ws_connection_manager
+    with connect_agent(client) as agent, connect_invoker(client) as invoker:
+        invoker.send_bytes(
+            ENVELOPE_CODEC.encode(
+                {
+                    "message_type": "agent_invoke",
+                    "agent_uuid": AGENT_UUID,
+                    "request_payload": {"x": 1},
+                    "request_metadata": request_metadata,
+                }
+            )
+        )
+        invoke = ENVELOPE_CODEC.decode(agent.receive_bytes())
+        # The agent still gets the metadata, which travels in the header
+        assert invoke["request_metadata"] == request_metadata
+        assert invoke["request_payload"] == {"x": 1}
+
+        invocation = manager.invocations.complete(invoke["invoked_by"], AGENT_UUID)
+        assert invocation is not None
+        assert invocation.request_id == "r-1"
+        assert invocation.deadline - invocation.started_at == pytest.approx(
+            expected_timeout, abs=1
+        )
@@ -0,0 +1,208 @@
+import json
+import struct
+from abc import ABC, abstractmethod
+from typing import Any
+
+import msgpack
+import orjson
+
+
+class CodecError(ValueError):
+    """
+    Raised when a frame can't be decoded with the codec of the connection.
+    """
+
+
+class Codec(ABC):
+    """
+    Wire codec used to (de)serialize WebSocket frames of a single connection.
+    """
+
+    name: str
+    label: str
+    binary: bool
+
+    @abstractmethod
+    def decode(self, frame: str | bytes) -> dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def encode(self, message: dict[str, Any]) -> str | bytes:
+        pass
+
+
+class JSONCodec(Codec):
+    """
+    Default codec: JSON text frames, compatible with every existing client.
+    """
+
+    name = "json"
+    label = "JSON"
+    binary = False
+
+    def decode(self, frame: str | bytes) -> dict[str, Any]:
+        try:
+            return json.loads(frame)
+        except json.JSONDecodeError as e:
+            raise CodecError(str(e)) from e
+
+    def encode(self, message: dict[str, Any]) -> str:
+        return json.dumps(message)
+
+
+class ORJSONCodec(Codec):
+    """
+    JSON in binary frames, (de)serialized with orjson.
+    """
+
+    name = "orjson"
+    label = "JSON"
+    binary = True
+
+    def decode(self, frame: str | bytes) -> dict[str, Any]:
+        try:
+            return orjson.loads(frame)
+        except orjson.JSONDecodeError as e:
+            raise CodecError(str(e)) from e
+
+    def encode(self, message: dict[str, Any]) -> bytes:
+        return orjson.dumps(message)
+
+
+class MsgPackCodec(Codec):
+    """
+    MessagePack binary frames.
+    """
+
+    name = "msgpack"
+    label = "MessagePack"
+    binary = True
+
+    def decode(self, frame: str | bytes) -> dict[str, Any]:
+        try:
+            message = msgpack.unpackb(frame)
+        except (ValueError, TypeError, msgpack.UnpackException) as e:
+            raise CodecError(str(e)) from e
+
+        if not isinstance(message, dict):
+            raise CodecError("MessagePack frame is not a map")
+        return message
+
+    def encode(self, message: dict[str, Any]) -> bytes:
+        return msgpack.packb(message)
+
+
+class EnvelopeCodec(Codec):
+    """
+    Binary frames with the routing fields split from the payload:
+
+        b"GENV" | header length (uint32, big-endian) | header (JSON map) | payload (JSON map)
+
+    The header holds only the envelope fields, so the router can route a frame by
+    reading its first bytes and splice the payload through without parsing it.
+    request_metadata is part of the header, since it carries the deadline of an invocation.
+    """
+
+    name = "envelope"
+    label = "envelope"
+    binary = True
+
+    MAGIC = b"GENV"
+    ENVELOPE_FIELDS = ("message_type", "agent_uuid", "invoked_by", "request_metadata")
+    _PREFIX = struct.Struct(">4sI")
+
+    def read_header(self, frame: bytes) -> tuple[dict[str, Any], int]:
+        """
+        Reads the envelope header without touching the payload.
+
+        Args:
+            frame (bytes): The envelope frame.
+
+        Returns:
+            tuple[dict[str, Any], int]: The header and the offset at which the payload starts.
+        """
+        if len(frame) < self._PREFIX.size:
+            raise CodecError("Envelope frame is too short")
+
+        magic, header_length = self._PREFIX.unpack_from(frame)
+        payload_offset = self._PREFIX.size + header_length
+        if magic != self.MAGIC or payload_offset > len(frame):
+            raise CodecError("Malformed envelope frame")
+
+        try:
+            header = orjson.loads(memoryview(frame)[self._PREFIX.size : payload_offset])
+        except orjson.JSONDecodeError as e:
+            raise CodecError(str(e)) from e
+        return header, payload_offset
+
+    def splice(
+        self, header: dict[str, Any], frame: bytes, payload_offset: int
+    ) -> bytes:
+        """
+        Builds a frame with a new header around the untouched payload of another frame.
+        """
+        encoded_header = orjson.dumps(header)
+        return b"".join(
+            (
+                self._PREFIX.pack(self.MAGIC, len(encoded_header)),
+                encoded_header,
+                memoryview(frame)[payload_offset:],
+            )
+        )
+
+    def decode_payload(self, frame: bytes, payload_offset: int) -> dict[str, Any]:
+        """
+        Decodes the payload part of an envelope frame.
+        """
+        if payload_offset == len(frame):
+            return {}
+        try:
+            return orjson.loads(memoryview(frame)[payload_offset:])
+        except orjson.JSONDecodeError as e:
+            raise CodecError(str(e)) from e
+
+    def decode(self, frame: str | bytes) -> dict[str, Any]:
+        if isinstance(frame, str):
+            frame = frame.encode()
+        header, payload_offset = self.read_header(frame)
+        return {**self.decode_payload(frame, payload_offset), **header}
+
+    def encode(self, message: dict[str, Any]) -> bytes:
+        header = {
+            key: message[key] for key in self.ENVELOPE_FIELDS if key in message
+        }
+        payload = {
+            key: value
+            for key, value in message.items()
+            if key not in self.ENVELOPE_FIELDS
+        }
+        encoded_header = orjson.dumps(header)
+        return b"".join(
+            (
+                self._PREFIX.pack(self.MAGIC, len(encoded_header)),
+                encoded_header,
+                orjson.dumps(payload),
+            )
+        )
+
+
+JSON_CODEC = JSONCodec()
+ENVELOPE_CODEC = EnvelopeCodec()
+
+CODECS: dict[str, Codec] = {
+    codec.name: codec
+    for codec in (JSON_CODEC, ORJSONCodec(), MsgPackCodec(), ENVELOPE_CODEC)
+}
+
+
+def get_codec(name: str | None) -> Codec:
+    """
+    Resolves the codec requested by a client.
+
+    Args:
+        name (str | None): Codec name from the `x-genai-codec` header.
+
+    Returns:
+        Codec: The requested codec, or JSON if it's unknown.
+    """
+    return CODECS.get((name or "").strip().lower(), JSON_CODEC)
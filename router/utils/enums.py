@@ -3,11 +3,13 @@ from enum import Enum
 
 class WSMessageType(Enum):
     AGENT_REGISTER = "agent_register"
+    AGENT_REGISTER_BATCH = "agent_register_batch"
     AGENT_UNREGISTER = "agent_unregister"
     AGENT_INVOKE = "agent_invoke"
     AGENT_RESPONSE = "agent_response"
     AGENT_ERROR = "agent_error"
     AGENT_LOG = "agent_log"
+    AGENT_STREAM = "agent_stream"
     ML_INVOKE = "ml_invoke"
 
 
@@ -22,3 +24,16 @@ class ErrorType(Enum):
     AGENT_NOT_ACTIVE = "AgentNotActive"
     INVALID_JSON_REQUEST_FORMAT = "InvalidJSONRequestFormat"
     NO_REQUEST_PAYLOAD = "NoRequestPayload"
+    AGENT_INVOCATION_TIMEOUT = "AgentInvocationTimeout"
+    AGENT_OVERLOADED = "AgentOverloaded"
+    RATE_LIMIT_EXCEEDED = "RateLimitExceeded"
+
+
+class SendQueuePolicy(Enum):
+    DROP = "drop"
+    PARK = "park"
+
+
+class ReplicaBalancing(Enum):
+    LEAST_OUTSTANDING = "least_outstanding"
+    ROUND_ROBIN = "round_robin"
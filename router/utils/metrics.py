@@ -0,0 +1,131 @@
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from utils.enums import MasterServerName, WSMessageType
+
+if TYPE_CHECKING:
+    from connectors.ws_connector_manager import WSConnectionManager
+
+# Label values are limited to known message types, anything else would let clients
+# create arbitrary time series
+MESSAGE_TYPES = {message_type.value for message_type in WSMessageType}
+
+MESSAGES_RECEIVED = Counter(
+    "router_messages_received_total",
+    "Messages received from clients",
+    ["message_type"],
+)
+BYTES_RECEIVED = Counter(
+    "router_received_bytes_total",
+    "Size of frames received from clients, in bytes (binary) or characters (text)",
+    ["message_type"],
+)
+ROUTING_SECONDS = Histogram(
+    "router_routing_seconds",
+    "Time from receiving a message to enqueueing it for its receivers",
+    ["message_type", "path"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+FRAMES_SENT = Counter(
+    "router_frames_sent_total",
+    "Frames written to client sockets",
+)
+BYTES_SENT = Counter(
+    "router_sent_bytes_total",
+    "Size of frames written to client sockets, in bytes (binary) or characters (text)",
+)
+FRAMES_DROPPED = Counter(
+    "router_frames_dropped_total",
+    "Frames dropped by send queue policies",
+)
+
+
+def frame_size(frame: str | bytes) -> int:
+    """
+    Returns the size of a frame without copying it. ASGI servers hand text frames over
+    decoded, so their length is counted in characters, which equals their UTF-8 size for
+    ASCII-only frames (JSON encoders escape everything else by default).
+    """
+    return len(frame)
+
+
+def observe_message(
+    message_type: Optional[str], size: int, elapsed: float, path: str
+) -> None:
+    """
+    Records a message received from a client.
+
+    Args:
+        message_type (Optional[str]): The type of the message, None if it couldn't be decoded.
+        size (int): Size of the frame as received, see `frame_size`.
+        elapsed (float): Seconds spent routing the message.
+        path (str): `envelope` for the envelope fast path, `decoded` otherwise.
+    """
+    label = message_type if message_type in MESSAGE_TYPES else "unknown"
+    MESSAGES_RECEIVED.labels(label).inc()
+    BYTES_RECEIVED.labels(label).inc(size)
+    ROUTING_SECONDS.labels(label, path).observe(elapsed)
+
+
+def role_of(client_id: str) -> str:
+    """
+    Returns the role of a client, used instead of client IDs in labels as invoke keys
+    may contain API keys.
+    """
+    if client_id in (server.value for server in MasterServerName):
+        return client_id
+    # Invoke keys have the form <caller_id>:<target>
+    return "invoker" if ":" in client_id else "agent"
+
+
+class RouterCollector(Collector):
+    """
+    Collects gauges from the state of a connection manager at scrape time.
+    """
+
+    def __init__(self, manager: "WSConnectionManager"):
+        self.manager = manager
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        connections = GaugeMetricFamily(
+            "router_connections", "Open client connections", labels=["role"]
+        )
+        queue_depth = GaugeMetricFamily(
+            "router_send_queue_depth",
+            "Frames waiting in send queues",
+            labels=["role"],
+        )
+        queue_max_depth = GaugeMetricFamily(
+            "router_send_queue_max_depth",
+            "Deepest send queue since its connection was opened",
+            labels=["role"],
+        )
+        in_flight = GaugeMetricFamily(
+            "router_agent_in_flight_invocations",
+            "Invocations forwarded to an agent and waiting for its response",
+            labels=["agent_uuid"],
+        )
+
+        by_role: dict[str, list[int]] = {}
+        for pool in list(self.manager.active_connections.values()):
+            stats = by_role.setdefault(role_of(pool.client_id), [0, 0, 0])
+            for connection in pool:
+                stats[0] += 1
+                stats[1] += connection.outbound.depth
+                stats[2] = max(stats[2], connection.outbound.max_depth)
+
+        for role, (count, depth, max_depth) in by_role.items():
+            connections.add_metric([role], count)
+            queue_depth.add_metric([role], depth)
+            queue_max_depth.add_metric([role], max_depth)
+
+        for agent_uuid, count in self.manager.invocations.pending_by_agent().items():
+            if role_of(agent_uuid) != "invoker":
+                in_flight.add_metric([agent_uuid], count)
+
+        yield connections
+        yield queue_depth
+        yield queue_max_depth
+        yield in_flight